@@ -1,6 +1,6 @@
-import pandas as pd
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.exc import SQLAlchemyError
+from lector_excel import leer_hoja
 
 # --- CONFIGURACIÓN DE LA BASE DE DATOS MYSQL ---
 # Datos que proporcionaste
@@ -20,7 +20,7 @@ print("Iniciando el proceso de carga de datos a MySQL...")
 try:
     # --- 1. LEER DATOS DEL ARCHIVO EXCEL ---
     print(f"Leyendo el archivo Excel desde: {RUTA_ARCHIVO}")
-    df = pd.read_excel(RUTA_ARCHIVO, sheet_name=HOJA_DATOS)
+    df = leer_hoja(RUTA_ARCHIVO, HOJA_DATOS)
     print(f"Se han leído {len(df)} filas del archivo Excel.")
 
     # --- Limpieza de nombres de columna para compatibilidad con SQL ---
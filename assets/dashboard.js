@@ -0,0 +1,211 @@
+// Renderizado en el navegador para MODO_RENDER = 'cliente' (ver dashboard_kpi_DB.py).
+// Arma las tarjetas KPI, los cuatro gráficos y el ranking a partir del payload compacto de
+// conteos (store-agregados) y de los datos fijos de store-config-cliente, con la misma
+// estructura que crear_tarjeta_kpi, la fábrica de gráficos y calcular_tab_ranking en Python.
+(function () {
+    function html(tipo, props) {
+        return {namespace: 'dash_html_components', type: tipo, props: props};
+    }
+
+    function dbc(tipo, props) {
+        return {namespace: 'dash_bootstrap_components', type: tipo, props: props};
+    }
+
+    // Equivalente a f"{valor:.2%}" de Python
+    function porcentaje(valor) {
+        return (valor * 100).toFixed(2) + '%';
+    }
+
+    function sinDatos(agregados) {
+        return !agregados.ejecutivos || agregados.ejecutivos.length === 0;
+    }
+
+    // Totales por ejecutivo, corregidas y capacidad a partir de la matriz ejecutivo x status
+    function totalesEjecutivos(agregados) {
+        var corregido = agregados.status.indexOf('Corregido');
+        var capacidad = agregados.status.indexOf('Capacidad');
+        return agregados.ejecutivo_status.map(function (fila, i) {
+            return {
+                ejecutivo: agregados.ejecutivos[i],
+                total: fila.reduce(function (a, b) { return a + b; }, 0),
+                corregidas: corregido >= 0 ? fila[corregido] : 0,
+                capacidad: capacidad >= 0 ? fila[capacidad] : 0
+            };
+        });
+    }
+
+    function ordenarDescendente(filas, clave) {
+        // Array.prototype.sort es estable: los empates quedan en orden alfabético, como en pandas
+        return filas.slice().sort(function (a, b) { return b[clave] - a[clave]; });
+    }
+
+    function tarjetaKpi(titulo, valor, color, icono) {
+        return dbc('Col', {children: dbc('Card', {
+            children: dbc('CardBody', {children: [
+                html('Div', {children: [
+                    html('H6', {children: titulo, className: 'card-title text-muted me-2'}),
+                    html('I', {className: icono, style: {fontSize: '1.2em', color: 'grey'}})
+                ], className: 'd-flex align-items-center'}),
+                html('H3', {children: valor, className: 'card-text text-' + color + ' fw-bold'})
+            ]}),
+            className: 'shadow-sm text-center border-0 rounded-lg'
+        })});
+    }
+
+    function layoutGrafico(config, titulo, extra) {
+        return Object.assign({template: config.plantilla, title: {text: titulo, x: 0.5}, font: {size: 10}}, extra);
+    }
+
+    function figuraTorta(config, etiquetas, valores, titulo, nombreEtiqueta, nombreValor) {
+        return {
+            data: [{
+                type: 'pie', labels: etiquetas, values: valores, hole: 0.4,
+                textposition: 'inside', textinfo: 'percent+label', hoverinfo: 'label+percent+value',
+                hovertemplate: nombreEtiqueta + '=%{label}<br>' + nombreValor + '=%{value}<extra></extra>',
+                marker: {line: {color: '#000000', width: 1}}
+            }],
+            layout: layoutGrafico(config, titulo, {showlegend: false})
+        };
+    }
+
+    function tarjetas(agregados, config) {
+        if (!agregados) {
+            return window.dash_clientside.no_update;
+        }
+        if (sinDatos(agregados)) {
+            return [config.sin_datos, config.sin_datos, config.sin_datos];
+        }
+        var filas = totalesEjecutivos(agregados);
+        var suma = function (clave) { return filas.reduce(function (a, f) { return a + f[clave]; }, 0); };
+        var totales = suma('total');
+        var capacidad = suma('capacidad');
+        var corregidas = suma('corregidas');
+        var dias = agregados.dias.length;
+        var ejecutivos = filas.length;
+        var fteDia = dias > 0 && ejecutivos > 0 ? Math.trunc(((totales - capacidad) / dias) / ejecutivos) : 0;
+        var lista = [
+            tarjetaKpi('Gestiones Totales', String(totales), 'primary', 'bi bi-clipboard-data'),
+            tarjetaKpi('Total Ejecutivos', String(ejecutivos), 'dark', 'bi bi-people'),
+            tarjetaKpi('Gestiones Atendidas', porcentaje(totales > 0 ? (totales - capacidad) / totales : 0), 'success', 'bi bi-check-circle'),
+            tarjetaKpi('Tasa de Resolutividad', porcentaje(totales > 0 ? corregidas / totales : 0), 'info', 'bi bi-graph-up'),
+            tarjetaKpi('Gestión FTE Día', String(fteDia), 'secondary', 'bi bi-person-workspace')
+        ];
+        return [lista, lista, lista];
+    }
+
+    function graficos(agregados, config) {
+        if (!agregados) {
+            return window.dash_clientside.no_update;
+        }
+        if (sinDatos(agregados)) {
+            return [config.figura_vacia, config.figura_vacia, config.figura_vacia, config.figura_vacia];
+        }
+        var col = config.columnas;
+        var filas = totalesEjecutivos(agregados);
+
+        var figTorre = figuraTorta(config, agregados.torres, agregados.cantidad_torre,
+            'Distribución de Gestiones por Torre', col.torre, col.orden);
+
+        var resolutividad = ordenarDescendente(filas.map(function (f) {
+            return {ejecutivo: f.ejecutivo, tasa: f.total > 0 ? f.corregidas / f.total * 100 : 0};
+        }), 'tasa');
+        var figResolutividad = {
+            data: [{
+                type: 'bar', orientation: 'h',
+                x: resolutividad.map(function (f) { return f.tasa; }),
+                y: resolutividad.map(function (f) { return f.ejecutivo; }),
+                texttemplate: '%{x:.0f}%', textposition: 'outside', marker: {color: '#28a745'},
+                hovertemplate: 'Tasa de Resolutividad=%{x}<br>' + col.ejecutivo + '=%{y}<extra></extra>'
+            }],
+            layout: layoutGrafico(config, 'Tasa de Resolutividad por Ejecutivo',
+                {xaxis: {title: {text: 'Porcentaje (%)'}}, yaxis: {categoryorder: 'total ascending'}})
+        };
+
+        var figVolumen = figuraTorta(config, agregados.ejecutivos, filas.map(function (f) { return f.total; }),
+            'Distribución de Gestiones por Ejecutivo', col.ejecutivo, 'Cantidad');
+
+        // Una traza por status, en el orden en que aparecen al recorrer (ejecutivo, status)
+        var trazas = {};
+        var orden = [];
+        agregados.ejecutivo_status.forEach(function (fila, i) {
+            fila.forEach(function (cantidad, j) {
+                if (cantidad <= 0) {
+                    return;
+                }
+                var status = agregados.status[j];
+                if (!trazas[status]) {
+                    trazas[status] = {x: [], y: []};
+                    orden.push(status);
+                }
+                trazas[status].x.push(agregados.ejecutivos[i]);
+                trazas[status].y.push(cantidad);
+            });
+        });
+        var figComposicion = {
+            data: orden.map(function (status, i) {
+                return {
+                    type: 'bar', name: status, x: trazas[status].x, y: trazas[status].y,
+                    texttemplate: '%{y}', marker: {color: config.colores[i % config.colores.length]},
+                    hovertemplate: col.status + '=' + status + '<br>' + col.ejecutivo + '=%{x}<br>Cantidad=%{y}<extra></extra>'
+                };
+            }),
+            layout: layoutGrafico(config, 'Composición de Status por Ejecutivo (Cantidad)', {
+                barmode: 'stack', legend: {title: {text: col.status}},
+                xaxis: {categoryorder: 'array', categoryarray: ordenarDescendente(filas, 'total').map(function (f) { return f.ejecutivo; })},
+                yaxis: {title: {text: 'Cantidad de Gestiones'}}
+            })
+        };
+        return [figTorre, figResolutividad, figVolumen, figComposicion];
+    }
+
+    function ranking(agregados, config) {
+        if (!agregados) {
+            return window.dash_clientside.no_update;
+        }
+        if (sinDatos(agregados)) {
+            return [config.sin_datos, config.sin_datos];
+        }
+        var filas = ordenarDescendente(totalesEjecutivos(agregados).filter(function (f) {
+            return config.ejecutivos_ranking.indexOf(f.ejecutivo) >= 0;
+        }).map(function (f) {
+            return Object.assign({score: f.total > 0 ? f.corregidas / f.total : 0}, f);
+        }), 'score');
+        if (filas.length === 0) {
+            return [config.sin_ranking, config.sin_ranking];
+        }
+        var claseItem = 'd-flex justify-content-start align-items-center py-2 border-0 border-bottom';
+        var itemsRanking = filas.map(function (f, i) {
+            var color = i === 0 ? 'success' : i === 1 ? 'info' : i === 2 ? 'primary' : 'secondary';
+            var icono = i === 0 ? 'bi bi-trophy-fill' : i === 1 ? 'bi bi-award-fill' : 'bi bi-star-fill';
+            return dbc('ListGroupItem', {children: [
+                html('I', {className: icono + ' me-2 text-' + color}),
+                html('Span', {children: f.ejecutivo, className: 'fw-bold me-auto'}),
+                dbc('Badge', {children: porcentaje(f.score), color: color, pill: true, className: 'ms-3 fs-6'})
+            ], className: claseItem});
+        });
+        var itemsCantidad = filas.map(function (f) {
+            return dbc('ListGroupItem', {children: [
+                html('Span', {children: f.ejecutivo, className: 'fw-bold me-auto'}),
+                html('Div', {children: [
+                    dbc('Badge', {children: porcentaje(f.total > 0 ? f.corregidas / f.total : 0), color: 'success', className: 'me-2', pill: true}),
+                    dbc('Badge', {children: 'Corregidas: ' + f.corregidas, color: 'primary', className: 'me-2', pill: true}),
+                    dbc('Badge', {children: 'Asignadas: ' + f.total, color: 'light', text_color: 'dark', pill: true})
+                ], className: 'ms-3'})
+            ], className: claseItem});
+        });
+        var tarjeta = function (titulo, items) {
+            return dbc('Card', {
+                children: dbc('CardBody', {children: [
+                    html('H4', {children: titulo, className: 'card-title text-center'}),
+                    dbc('ListGroup', {children: items, flush: true, className: 'border-0'})
+                ]}),
+                className: 'shadow-sm border-0 rounded-lg'
+            });
+        };
+        return [tarjeta('Ranking de Resolutividad', itemsRanking), tarjeta('Detalle de Gestiones', itemsCantidad)];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard_kpi: {tarjetas: tarjetas, graficos: graficos, ranking: ranking}
+    });
+})();
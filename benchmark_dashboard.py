@@ -0,0 +1,330 @@
+"""Benchmarks de las rutas de carga y cálculo del dashboard con datos sintéticos.
+
+Uso:
+    python benchmark_dashboard.py              # ejecuta todos los benchmarks
+    python benchmark_dashboard.py calendario   # solo uno
+
+Importar dashboard_kpi_DB intenta la carga inicial desde la base de datos; sin las
+variables de entorno solo informa el error y el benchmark continúa con datos sintéticos.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+import dashboard_kpi_DB as dash_db
+import lector_excel
+from dashboard_kpi_DB import COLUMNA_FECHA, COLUMNA_ANALISTA, COLUMNA_ORDEN, COLUMNA_STATUS, COLUMNA_TORRE
+
+
+def generar_gestiones(n, n_ejecutivos=50, n_torres=10, dias=150, semilla=0):
+    """Tabla con la misma forma que consolidado_fullstack tal como llega de MySQL."""
+    rng = np.random.default_rng(semilla)
+    ejecutivos = np.array([f"Ejecutivo {i:03d}" for i in range(n_ejecutivos)], dtype=object)
+    torres = np.array([f"Torre {i:02d}" for i in range(n_torres)], dtype=object)
+    status = np.array(['Corregido', 'Capacidad', 'Pendiente', 'Escalado'], dtype=object)
+    segundos = rng.integers(0, dias * 24 * 3600, n)
+    return pd.DataFrame({
+        COLUMNA_FECHA: pd.Timestamp('2025-08-01') + pd.to_timedelta(segundos, unit='s'),
+        COLUMNA_ANALISTA: ejecutivos[rng.integers(0, n_ejecutivos, n)],
+        COLUMNA_ORDEN: np.char.add('P', np.arange(n).astype(str)).astype(object),
+        COLUMNA_STATUS: status[rng.integers(0, len(status), n)],
+        COLUMNA_TORRE: torres[rng.integers(0, n_torres, n)],
+    })
+
+
+def medir(funcion, repeticiones=1):
+    """Mejor tiempo en segundos de varias ejecuciones."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+# --- CALENDARIO DEL CARGADOR ---
+def preparar_datos_anterior(df):
+    """Cargador previo: columnas de calendario fila a fila con strftime y parseo de texto."""
+    df[COLUMNA_FECHA] = pd.to_datetime(df[COLUMNA_FECHA], errors='coerce')
+    df.dropna(subset=[COLUMNA_FECHA, COLUMNA_ANALISTA, COLUMNA_TORRE, COLUMNA_STATUS], inplace=True)
+    df = df[df[COLUMNA_FECHA].dt.month >= 8].sort_values(by=COLUMNA_FECHA)
+    df['Mes'] = df[COLUMNA_FECHA].dt.strftime('%B').str.capitalize()
+    df['Year'] = df[COLUMNA_FECHA].dt.isocalendar().year
+    df['Semana_Num'] = df[COLUMNA_FECHA].dt.isocalendar().week
+    df['WeekStartDate'] = pd.to_datetime(df['Year'].astype(str) + df['Semana_Num'].astype(str) + '1', format='%G%V%u')
+    df['WeekEndDate'] = df['WeekStartDate'] + pd.to_timedelta('6 days')
+    df['WeekLabel'] = "Semana " + df['Semana_Num'].astype(str) + " (" + df['WeekStartDate'].dt.strftime('%d %b') + " - " + df['WeekEndDate'].dt.strftime('%d %b') + ")"
+    return df
+
+
+def benchmark_calendario(tamanos=(100_000, 1_000_000, 5_000_000)):
+    print("Cargador (limpieza + columnas de calendario)")
+    print(f"{'filas':>10} {'anterior (s)':>14} {'actual (s)':>12} {'aceleración':>12}")
+    for n in tamanos:
+        df = generar_gestiones(n)
+        t_anterior = medir(lambda: preparar_datos_anterior(df.copy()))
+        t_actual = medir(lambda: dash_db.preparar_datos(df.copy()))
+        print(f"{n:>10,} {t_anterior:>14.2f} {t_actual:>12.2f} {t_anterior / t_actual:>11.1f}x")
+
+
+# --- FILTROS ---
+def aplicar_filtros_anterior(df, columna_fecha, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    """Filtrado previo: una máscara booleana y una copia del frame por cada filtro activo."""
+    if meses: df = df[df['Mes'].isin(meses)]
+    if modo_tiempo == 'quincena' and quincena:
+        df = df[df[columna_fecha].dt.day <= 15 if quincena == 1 else df[columna_fecha].dt.day > 15]
+    elif modo_tiempo == 'semana' and semanas:
+        df = df[df['Semana_Num'].isin(semanas)]
+    if torres: df = df[df[COLUMNA_TORRE].isin(torres)]
+    if ejecutivos: df = df[df[COLUMNA_ANALISTA].isin(ejecutivos)]
+    return df
+
+
+def benchmark_filtros(n=1_000_000, repeticiones=5):
+    df = dash_db.preparar_datos(generar_gestiones(n))
+    inicio = time.perf_counter()
+    indice = dash_db.construir_indice_filtros(df, COLUMNA_FECHA)
+    t_indice = time.perf_counter() - inicio
+    meses = list(df['Mes'].cat.categories[:2])
+    semanas = sorted(df['Semana_Num'].unique().tolist())[:3]
+    combinaciones = {
+        'sin filtros': (None, None, None, None, None, 'quincena'),
+        'mes + quincena': (meses, 1, None, None, None, 'quincena'),
+        'semanas + torre': (None, None, semanas, ['Torre 01'], None, 'semana'),
+        'los cinco': (meses, 2, None, ['Torre 01', 'Torre 02'], ['Ejecutivo 001', 'Ejecutivo 002'], 'quincena'),
+    }
+    memoria_indice = sum(posiciones.nbytes for dimension, grupos in indice.items() if dimension != 'filas' for posiciones in grupos.values())
+    print(f"Filtros sobre {n:,} gestiones (índice construido en {t_indice:.2f} s, {memoria_indice / 1024 ** 2:.1f} MB)")
+    print(f"{'combinación':>16} {'anterior (s)':>14} {'índice (s)':>12} {'aceleración':>12}")
+    for nombre, filtros in combinaciones.items():
+        esperado = aplicar_filtros_anterior(df, COLUMNA_FECHA, *filtros)
+        assert dash_db.aplicar_filtros(df, indice, *filtros).equals(esperado), nombre
+        t_anterior = medir(lambda: aplicar_filtros_anterior(df, COLUMNA_FECHA, *filtros), repeticiones)
+        t_actual = medir(lambda: dash_db.aplicar_filtros(df, indice, *filtros), repeticiones)
+        print(f"{nombre:>16} {t_anterior:>14.3f} {t_actual:>12.3f} {t_anterior / t_actual:>11.1f}x")
+
+
+# --- LECTURA DEL EXCEL ---
+def escribir_libro_sintetico(ruta, n):
+    """Libro con la hoja consolidada: las columnas del dashboard y algunas columnas extra de texto."""
+    df = generar_gestiones(n).rename(columns={
+        COLUMNA_FECHA: 'Fecha', COLUMNA_ANALISTA: 'Ejecutivo', COLUMNA_ORDEN: 'Número de pedido',
+        COLUMNA_STATUS: 'Status Real', COLUMNA_TORRE: 'Torre',
+    })
+    df['Cliente'] = 'Cliente ' + (df.index % 997).astype(str)
+    df['Comentario'] = 'Observación de la gestión ' + (df.index % 31).astype(str)
+    df['Monto'] = (df.index % 1000) * 1.5
+    # Celdas con marcadores de vacío que pd.read_excel convierte en NaN
+    df['Comentario'] = df['Comentario'].mask(df.index % 50 == 0, 'N/A')
+    df['Monto'] = df['Monto'].astype(object).mask(df.index % 97 == 0, '#N/A')
+    df.to_excel(ruta, sheet_name=dash_db.HOJA_DATOS, index=False, engine='xlsxwriter')
+
+
+def benchmark_excel(n=200_000):
+    columnas_dashboard = ['Fecha', 'Ejecutivo', 'Número de pedido', 'Status Real', 'Torre']
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'FullStack_Consolidado.xlsx')
+        escribir_libro_sintetico(ruta, n)
+        print(f"Lectura de un libro de {n:,} filas ({os.path.getsize(ruta) / 1024 ** 2:.1f} MB)")
+        inicio = time.perf_counter()
+        esperado = pd.read_excel(ruta, sheet_name=dash_db.HOJA_DATOS)
+        t_anterior = time.perf_counter() - inicio
+        print(f"{'lector':>36} {'tiempo (s)':>12} {'aceleración':>12}")
+        print(f"{'pd.read_excel (openpyxl)':>36} {t_anterior:>12.2f} {1:>11.1f}x")
+
+        casos = {'openpyxl solo lectura': ('openpyxl', None), 'openpyxl solo lectura, 5 columnas': ('openpyxl', columnas_dashboard)}
+        if lector_excel.MOTOR_RAPIDO:
+            casos[f'{lector_excel.MOTOR_RAPIDO}'] = (lector_excel.MOTOR_RAPIDO, None)
+            casos[f'{lector_excel.MOTOR_RAPIDO}, 5 columnas'] = (lector_excel.MOTOR_RAPIDO, columnas_dashboard)
+        for nombre, (motor, columnas) in casos.items():
+            inicio = time.perf_counter()
+            df = lector_excel.leer_hoja(ruta, dash_db.HOJA_DATOS, columnas, motor=motor)
+            t_actual = time.perf_counter() - inicio
+            pd.testing.assert_frame_equal(df, esperado[columnas or esperado.columns], check_dtype=False)
+            print(f"{nombre:>36} {t_actual:>12.2f} {t_anterior / t_actual:>11.1f}x")
+        if not lector_excel.MOTOR_RAPIDO:
+            print("(python-calamine no está instalado; se omite el motor calamine)")
+
+
+# --- TABLAS DIARIAS ---
+def crear_tabla_conteo_diario_anterior(cubo, index_col, date_range=None):
+    """Tabla de conteo previa: pivot_table, join y orden de columnas re-parseando las fechas."""
+    total_general_col = cubo.groupby(index_col)['Cantidad'].sum().to_frame('Total General')
+    pivot_dia = pd.pivot_table(cubo, values='Cantidad', index=index_col, columns='Fecha_Dia', aggfunc='sum', fill_value=0)
+    if date_range is not None:
+        pivot_dia = pivot_dia.reindex(columns=date_range, fill_value=0)
+    resumen_df = total_general_col.join(pivot_dia).fillna(0).astype(int)
+    resumen_df.sort_values(by='Total General', ascending=False, inplace=True)
+    resumen_df.reset_index(inplace=True)
+    total_row = {index_col: 'Total General'}
+    total_row.update(resumen_df[resumen_df.select_dtypes(include='number').columns].sum().to_dict())
+    resumen_df = pd.concat([resumen_df, pd.DataFrame([total_row])], ignore_index=True)
+    resumen_df.columns = [col.strftime('%d-%m-%Y') if hasattr(col, 'strftime') else col for col in resumen_df.columns]
+    dia_cols = sorted([c for c in resumen_df.columns if c not in [index_col, 'Total General']], key=lambda x: pd.to_datetime(x, format='%d-%m-%Y'))
+    return resumen_df[[index_col] + dia_cols + ['Total General']]
+
+
+def crear_tabla_porcentaje_corregido_anterior(cubo, index_col, date_range=None):
+    """Tabla de porcentaje previa: dos pivot_table y cada celda formateada como texto con apply."""
+    pivot_total = pd.pivot_table(cubo, values='Cantidad', index=index_col, columns='Fecha_Dia', aggfunc='sum', fill_value=0)
+    pivot_corregido = pd.pivot_table(cubo[cubo[COLUMNA_STATUS] == 'Corregido'], values='Cantidad', index=index_col, columns='Fecha_Dia', aggfunc='sum', fill_value=0)
+    if date_range is not None:
+        pivot_total = pivot_total.reindex(columns=date_range, fill_value=0)
+        pivot_corregido = pivot_corregido.reindex(columns=date_range, fill_value=0)
+    resumen_df = (pivot_corregido / pivot_total).fillna(0)
+    resumen_df['Total General'] = cubo.groupby(index_col)['Cantidad'].sum()
+    resumen_df.fillna(0, inplace=True)
+    resumen_df.sort_values(by='Total General', ascending=False, inplace=True)
+    for col in [c for c in resumen_df.columns if c != 'Total General']:
+        resumen_df[col] = resumen_df[col].apply(lambda x: f"{x:.0%}")
+    resumen_df['Total General'] = resumen_df['Total General'].astype(int)
+    resumen_df.reset_index(inplace=True)
+    resumen_df.columns = [col.strftime('%d-%m-%Y') if hasattr(col, 'strftime') else col for col in resumen_df.columns]
+    dia_cols = sorted([c for c in resumen_df.columns if c not in [index_col, 'Total General']], key=lambda x: pd.to_datetime(x, format='%d-%m-%Y'))
+    return resumen_df[[index_col] + dia_cols + ['Total General']]
+
+
+def benchmark_tablas(n=500_000, ejecutivos=(50, 200), dias=90, repeticiones=5):
+    print(f"Tablas diarias de conteo y % corregido por ejecutivo ({n:,} gestiones, {dias} días)")
+    print(f"{'ejecutivos':>10} {'filas cubo':>11} {'anterior (s)':>14} {'actual (s)':>12} {'aceleración':>12}")
+    for n_ejecutivos in ejecutivos:
+        cubo = dash_db.construir_cubo(dash_db.preparar_datos(generar_gestiones(n, n_ejecutivos, dias=dias)))
+        conteo_anterior = crear_tabla_conteo_diario_anterior(cubo, COLUMNA_ANALISTA)
+        porcentaje_anterior = crear_tabla_porcentaje_corregido_anterior(cubo, COLUMNA_ANALISTA)
+        cruce = dash_db.calcular_cruce_diario(cubo, COLUMNA_ANALISTA)
+        conteo, _, _ = dash_db.crear_tabla_conteo_diario(cubo, COLUMNA_ANALISTA, cruce=cruce)
+        porcentaje, _, _ = dash_db.crear_tabla_porcentaje_corregido(cubo, COLUMNA_ANALISTA, cruce=cruce)
+        pd.testing.assert_frame_equal(conteo, conteo_anterior)
+        # Los porcentajes ahora son números; con el mismo formato deben coincidir con el texto anterior
+        for col in porcentaje.attrs['columnas_porcentaje']:
+            porcentaje[col] = porcentaje[col].map(lambda x: f"{x:.0%}")
+        pd.testing.assert_frame_equal(porcentaje, porcentaje_anterior)
+
+        def actual():
+            cruce = dash_db.calcular_cruce_diario(cubo, COLUMNA_ANALISTA)
+            dash_db.crear_tabla_conteo_diario(cubo, COLUMNA_ANALISTA, cruce=cruce)
+            dash_db.crear_tabla_porcentaje_corregido(cubo, COLUMNA_ANALISTA, cruce=cruce)
+
+        t_anterior = medir(lambda: (crear_tabla_conteo_diario_anterior(cubo, COLUMNA_ANALISTA),
+                                    crear_tabla_porcentaje_corregido_anterior(cubo, COLUMNA_ANALISTA)), repeticiones)
+        t_actual = medir(actual, repeticiones)
+        print(f"{n_ejecutivos:>10} {len(cubo):>11,} {t_anterior:>14.3f} {t_actual:>12.3f} {t_anterior / t_actual:>11.1f}x")
+
+
+# --- GRÁFICOS ---
+def figuras_anteriores(agregados):
+    """Los cuatro gráficos como se armaban antes, con plotly.express y update_traces/update_layout."""
+    df_torre, df_resolutividad, df_ejec_total, df_status, orden = agregados
+
+    def torta_torre():
+        fig = px.pie(df_torre.reset_index(name=dash_db.COLUMNA_ORDEN), names=COLUMNA_TORRE, values=dash_db.COLUMNA_ORDEN, title='Distribución de Gestiones por Torre', hole=.4, template='plotly_white')
+        fig.update_traces(textposition='inside', textinfo='percent+label', hoverinfo='label+percent+value', marker=dict(line=dict(color='#000000', width=1)))
+        fig.update_layout(showlegend=False, title_x=0.5, font=dict(size=10))
+        return fig
+
+    def barras_resolutividad():
+        fig = px.bar(df_resolutividad.reset_index(name='Tasa de Resolutividad'), x='Tasa de Resolutividad', y=COLUMNA_ANALISTA, title='Tasa de Resolutividad por Ejecutivo', text_auto='.0f', orientation='h', template='plotly_white')
+        fig.update_traces(texttemplate='%{x:.0f}%', textposition='outside', marker_color='#28a745')
+        fig.update_layout(yaxis={'categoryorder': 'total ascending'}, xaxis_title='Porcentaje (%)', yaxis_title=None, title_x=0.5, font=dict(size=10))
+        return fig
+
+    def torta_ejecutivos():
+        fig = px.pie(df_ejec_total.reset_index(name='Cantidad'), names=COLUMNA_ANALISTA, values='Cantidad', title='Distribución de Gestiones por Ejecutivo', hole=.4, template='plotly_white')
+        fig.update_traces(textposition='inside', textinfo='percent+label', hoverinfo='label+percent+value', marker=dict(line=dict(color='#000000', width=1)))
+        fig.update_layout(showlegend=False, title_x=0.5, font=dict(size=10))
+        return fig
+
+    def composicion_status():
+        fig = px.bar(df_status, x=COLUMNA_ANALISTA, y='Cantidad', color=COLUMNA_STATUS, title='Composición de Status por Ejecutivo (Cantidad)', template='plotly_white', text_auto=True)
+        fig.update_layout(barmode='stack', xaxis_title=None, yaxis_title='Cantidad de Gestiones', title_x=0.5, xaxis={'categoryorder': 'array', 'categoryarray': orden}, font=dict(size=10))
+        return fig
+
+    return {'torta torre': torta_torre, 'resolutividad': barras_resolutividad, 'torta ejecutivos': torta_ejecutivos, 'composición': composicion_status}
+
+
+def figuras_actuales(agregados):
+    df_torre, df_resolutividad, df_ejec_total, df_status, orden = agregados
+    return {
+        'torta torre': lambda: dash_db.figura_torta(df_torre.index.to_numpy(), df_torre.to_numpy(), 'Distribución de Gestiones por Torre', COLUMNA_TORRE, dash_db.COLUMNA_ORDEN),
+        'resolutividad': lambda: dash_db.figura_barras_porcentaje(df_resolutividad.index.to_numpy(), df_resolutividad.to_numpy(), 'Tasa de Resolutividad por Ejecutivo', COLUMNA_ANALISTA, 'Tasa de Resolutividad', '#28a745'),
+        'torta ejecutivos': lambda: dash_db.figura_torta(df_ejec_total.index.to_numpy(), df_ejec_total.to_numpy(), 'Distribución de Gestiones por Ejecutivo', COLUMNA_ANALISTA, 'Cantidad'),
+        'composición': lambda: dash_db.figura_barras_apiladas(df_status, COLUMNA_ANALISTA, 'Cantidad', COLUMNA_STATUS, orden, 'Composición de Status por Ejecutivo (Cantidad)', 'Cantidad de Gestiones'),
+    }
+
+
+def benchmark_graficos(n=200_000, n_ejecutivos=60, repeticiones=20):
+    cubo = dash_db.construir_cubo(dash_db.preparar_datos(generar_gestiones(n, n_ejecutivos)))
+    df_ejec_total = cubo.groupby(COLUMNA_ANALISTA)['Cantidad'].sum()
+    df_ejec_corr = cubo[cubo[COLUMNA_STATUS] == 'Corregido'].groupby(COLUMNA_ANALISTA)['Cantidad'].sum()
+    agregados = (
+        cubo.groupby(COLUMNA_TORRE)['Cantidad'].sum(),
+        ((df_ejec_corr / df_ejec_total).fillna(0) * 100).sort_values(ascending=False),
+        df_ejec_total,
+        cubo.groupby([COLUMNA_ANALISTA, COLUMNA_STATUS])['Cantidad'].sum().reset_index(name='Cantidad'),
+        df_ejec_total.sort_values(ascending=False).index,
+    )
+    anteriores, actuales = figuras_anteriores(agregados), figuras_actuales(agregados)
+    print(f"Gráficos desde los datos agregados ({n_ejecutivos} ejecutivos); armado + serialización JSON, en ms")
+    print(f"{'gráfico':>18} {'px armado':>10} {'px JSON':>9} {'dict armado':>12} {'dict JSON':>10} {'aceleración':>12}")
+    for nombre in anteriores:
+        fig_anterior, fig_actual = anteriores[nombre](), actuales[nombre]()
+        t_armado_anterior = medir(anteriores[nombre], repeticiones) * 1000
+        t_json_anterior = medir(lambda: pio.json.to_json_plotly(fig_anterior), repeticiones) * 1000
+        t_armado_actual = medir(actuales[nombre], repeticiones) * 1000
+        t_json_actual = medir(lambda: pio.json.to_json_plotly(fig_actual), repeticiones) * 1000
+        total_anterior, total_actual = t_armado_anterior + t_json_anterior, t_armado_actual + t_json_actual
+        print(f"{nombre:>18} {t_armado_anterior:>10.2f} {t_json_anterior:>9.2f} {t_armado_actual:>12.3f} {t_json_actual:>10.2f} {total_anterior / total_actual:>11.1f}x")
+
+
+# --- RESUMEN MENSUAL ---
+def calcular_tabla_mensual_anterior(cubo_f):
+    """Tabla mensual previa: pivot_table y un bucle por torre con iterrows por ejecutivo."""
+    pivot_mensual = pd.pivot_table(cubo_f, values='Cantidad', index=[COLUMNA_TORRE, COLUMNA_ANALISTA], columns='Mes', aggfunc='sum', fill_value=0)
+    pivot_mensual['Total General'] = pivot_mensual.sum(axis=1)
+    sorted_active_months = sorted(cubo_f['Mes'].unique(), key=lambda m: dash_db.MESES_POR_NOMBRE.get(m, 99))
+    pivot_mensual = pivot_mensual[sorted_active_months + ['Total General']]
+    records = []
+    torre_totals = cubo_f.groupby(COLUMNA_TORRE)['Cantidad'].sum().sort_values(ascending=False)
+    for torre in torre_totals.index:
+        df_torre_pivot = pivot_mensual.loc[torre]
+        torre_row = {'Etiquetas de Fila': torre, 'Tipo': 'Torre'}; torre_row.update(df_torre_pivot.sum()); records.append(torre_row)
+        for ejecutivo_name, data in df_torre_pivot.iterrows():
+            ejec_row = {'Etiquetas de Fila': f'     {ejecutivo_name}', 'Tipo': 'Ejecutivo'}; ejec_row.update(data); records.append(ejec_row)
+    df_mensual_final = pd.DataFrame(records)
+    return df_mensual_final.to_dict('records'), [{'name': c, 'id': c} for c in df_mensual_final.columns if c != 'Tipo']
+
+
+def benchmark_mensual(tamanos=(200_000, 1_000_000), n_torres=20, n_ejecutivos=200, repeticiones=5):
+    print(f"Resumen mensual Torre/Ejecutivo ({n_torres} torres, {n_ejecutivos} ejecutivos)")
+    print(f"{'gestiones':>10} {'filas cubo':>11} {'anterior (s)':>14} {'actual (s)':>12} {'aceleración':>12}")
+    for n in tamanos:
+        cubo = dash_db.construir_cubo(dash_db.preparar_datos(generar_gestiones(n, n_ejecutivos, n_torres)))
+        filtros = (None, None, None, None, None, 'quincena')
+        # La tabla debe ser idéntica a la del bucle anterior: mismas filas, orden, columnas y valores
+        # (test_tabla_mensual.py la compara además con una tabla fija generada con el código anterior)
+        assert dash_db.calcular_tab_mensual(None, cubo, *filtros) == calcular_tabla_mensual_anterior(cubo)
+        t_anterior = medir(lambda: calcular_tabla_mensual_anterior(cubo), repeticiones)
+        t_actual = medir(lambda: dash_db.calcular_tab_mensual(None, cubo, *filtros), repeticiones)
+        print(f"{n:>10,} {len(cubo):>11,} {t_anterior:>14.3f} {t_actual:>12.3f} {t_anterior / t_actual:>11.1f}x")
+
+
+BENCHMARKS = {
+    'calendario': benchmark_calendario,
+    'filtros': benchmark_filtros,
+    'excel': benchmark_excel,
+    'tablas': benchmark_tablas,
+    'graficos': benchmark_graficos,
+    'mensual': benchmark_mensual,
+}
+
+if __name__ == '__main__':
+    seleccion = sys.argv[1:] or list(BENCHMARKS)
+    for nombre in seleccion:
+        print()
+        BENCHMARKS[nombre]()
@@ -9,6 +9,7 @@ import locale
 from datetime import datetime
 import io
 import os
+from lector_excel import leer_hoja
 
 # --- CONFIGURACIÓN ---
 try:
@@ -23,6 +24,8 @@ COLUMNA_ANALISTA = "Ejecutivo"
 COLUMNA_ORDEN = "Número de pedido"
 COLUMNA_STATUS = "Status Real"
 COLUMNA_TORRE = "Torre"
+# Nombre del mes (según el locale) -> número de mes
+MESES_POR_NOMBRE = {pd.Timestamp(2025, mes, 1).strftime('%B').capitalize(): mes for mes in range(1, 13)}
 
 EJECUTIVOS_FILTRADOS = [
     "Miguel Mantilla",
@@ -48,7 +51,7 @@ auth = dash_auth.BasicAuth(
 
 # --- FUNCIÓN DE CARGA DE DATOS ---
 def load_data():
-    df = pd.read_excel(RUTA_ARCHIVO, sheet_name=HOJA_DATOS)
+    df = leer_hoja(RUTA_ARCHIVO, HOJA_DATOS)
     df[COLUMNA_FECHA] = pd.to_datetime(df[COLUMNA_FECHA], errors='coerce')
 
     df.dropna(subset=[COLUMNA_FECHA, COLUMNA_ANALISTA, COLUMNA_TORRE, COLUMNA_STATUS], inplace=True)
@@ -62,12 +65,18 @@ def load_data():
     df = df[df[COLUMNA_FECHA].dt.month >= 8]
     df.sort_values(by=COLUMNA_FECHA, inplace=True)
 
-    df['Mes'] = df[COLUMNA_FECHA].dt.strftime('%B').str.capitalize()
-    df['Year'] = df[COLUMNA_FECHA].dt.isocalendar().year
-    df['Semana_Num'] = df[COLUMNA_FECHA].dt.isocalendar().week
-    df['WeekStartDate'] = pd.to_datetime(df['Year'].astype(str) + df['Semana_Num'].astype(str) + '1', format='%G%V%u')
-    df['WeekEndDate'] = df['WeekStartDate'] + pd.to_timedelta('6 days')
-    df['WeekLabel'] = "Semana " + df['Semana_Num'].astype(str) + " (" + df['WeekStartDate'].dt.strftime('%d %b') + " - " + df['WeekEndDate'].dt.strftime('%d %b') + ")"
+    # Las columnas de calendario se calculan una vez por día distinto y se asignan por código de día
+    codigos_dia, dias = pd.factorize(df[COLUMNA_FECHA].dt.normalize())
+    iso = dias.isocalendar()
+    calendario = pd.DataFrame({
+        'Mes': dias.strftime('%B').str.capitalize(),
+        'Year': iso['year'].to_numpy(),
+        'Semana_Num': iso['week'].to_numpy(),
+        'WeekStartDate': dias - pd.to_timedelta(dias.dayofweek, unit='D'),
+    })
+    calendario['WeekEndDate'] = calendario['WeekStartDate'] + pd.to_timedelta('6 days')
+    calendario['WeekLabel'] = "Semana " + calendario['Semana_Num'].astype(str) + " (" + calendario['WeekStartDate'].dt.strftime('%d %b') + " - " + calendario['WeekEndDate'].dt.strftime('%d %b') + ")"
+    df[calendario.columns] = calendario.take(codigos_dia).set_axis(df.index)
     return df
 
 # --- 1. LECTURA INICIAL DE DATOS ---
@@ -75,7 +84,7 @@ try:
     df_principal = load_data()
     last_modified_time = os.path.getmtime(RUTA_ARCHIVO)
     
-    meses_disponibles = sorted(df_principal['Mes'].unique(), key=lambda m: pd.to_datetime(f'01-{m}-2025', format='%d-%B-%Y').month)
+    meses_disponibles = sorted(df_principal['Mes'].unique(), key=lambda m: MESES_POR_NOMBRE.get(m, 99))
     week_map = df_principal[['Semana_Num', 'WeekLabel']].drop_duplicates().sort_values('Semana_Num')
     semanas_disponibles_options = week_map.apply(lambda row: {'label': row['WeekLabel'], 'value': row['Semana_Num']}, axis=1).tolist()
     ejecutivos_disponibles = sorted(df_principal[COLUMNA_ANALISTA].unique())
@@ -203,7 +212,7 @@ def actualizar_dashboard_completo(json_data, meses, quincena, semanas, torres, e
         return empty_df.to_dict('records'), empty_cols, empty_df.to_dict('records'), empty_cols, empty_df.to_dict('records'), empty_cols, empty_df.to_dict('records'), empty_cols, empty_df.to_dict('records'), empty_cols, tarjetas, tarjetas, tarjetas, empty_fig, empty_fig, empty_fig, empty_fig
     
     # --- Cálculos y lógica ---
-    all_months_ordered_local = sorted(df_principal['Mes'].unique(), key=lambda m: pd.to_datetime(f'01-{m}-2025', format='%d-%B-%Y').month)
+    all_months_ordered_local = sorted(df_principal['Mes'].unique(), key=lambda m: MESES_POR_NOMBRE.get(m, 99))
     
     # --- Cálculos para la tabla mensual ---
     pivot_mensual = pd.pivot_table(dff, values=COLUMNA_ORDEN, index=[COLUMNA_TORRE, COLUMNA_ANALISTA], columns='Mes', aggfunc='count', fill_value=0)
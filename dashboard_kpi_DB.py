@@ -1,17 +1,36 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.io as pio
 import dash
 import dash_auth
 import dash_bootstrap_components as dbc
-from dash import html, dcc, dash_table, Input, Output, callback, State
+import diskcache
+from dash import html, dcc, dash_table, Input, Output, callback, clientside_callback, ClientsideFunction, State, DiskcacheManager
+from dash.dash_table import FormatTemplate
 from dash.exceptions import PreventUpdate
 import locale
 from datetime import datetime
-import io
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.exc import SQLAlchemyError
+import threading
+import time
+import uuid
+from sqlalchemy import create_engine, text, bindparam, inspect
 import traceback
+import json
+import math
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import jsonify, send_file, abort, session, has_request_context
+from plotly.utils import PlotlyJSONEncoder
+import fcntl
+import tempfile
+import xlsxwriter
+import zlib
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 
 # --- 1. CONFIGURACIÓN GENERAL ---
 NOMBRE_TABLA = "consolidado_fullstack"
@@ -29,7 +48,25 @@ COLUMNA_ANALISTA = "EJECUTIVO"
 COLUMNA_ORDEN = "NUMERO_DE_PEDIDO"
 COLUMNA_STATUS = "STATUS_REAL"
 COLUMNA_TORRE = "TORRE"
+# Columna técnica de migrar_datos.py para la carga incremental; no se muestra ni se exporta
+COLUMNA_HASH = "ROW_HASH"
 VALID_USERNAME_PASSWORD_PAIRS = {'haintech': 'dashboard2025'}
+# Nombre del mes (según el locale) -> número de mes
+MESES_POR_NOMBRE = {pd.Timestamp(2025, mes, 1).strftime('%B').capitalize(): mes for mes in range(1, 13)}
+MES_INICIAL = 8
+# Dimensiones de baja cardinalidad que se guardan como categóricas
+COLUMNAS_CATEGORICAS = [COLUMNA_ANALISTA, COLUMNA_TORRE, COLUMNA_STATUS]
+
+# --- MODO DE CONSULTA ---
+# 'memoria': se carga la tabla completa y se filtra en pandas.
+# 'sql': los filtros y conteos se ejecutan en MySQL con WHERE/GROUP BY en cada interacción.
+MODO_BACKEND = os.environ.get("MODO_BACKEND", "memoria")
+
+# --- MODO DE RENDERIZADO ---
+# 'servidor': las tarjetas KPI, los gráficos y el ranking se arman en Python en cada interacción.
+# 'cliente': el servidor envía solo un payload compacto de conteos (store-agregados) y el navegador
+# arma las tarjetas, los gráficos y el ranking con los clientside callbacks de assets/dashboard.js.
+MODO_RENDER = os.environ.get("MODO_RENDER", "servidor")
 
 # --- EJECUTIVOS PARA EL RANKING KPI ---
 EJECUTIVOS_KPI_RANKING = [
@@ -43,100 +80,821 @@ EJECUTIVOS_KPI_RANKING = [
 ]
 
 
+# --- PESTAÑAS DEL DASHBOARD ---
+TAB_MENSUAL = 'tab-mensual'
+TAB_DIARIO = 'tab-diario'
+TAB_GRAFICOS = 'tab-graficos'
+TAB_RANKING = 'tab-ranking'
+TAB_DESCARGAR = 'tab-descargar'
+
+# --- TABLAS DIARIAS PAGINADAS EN EL SERVIDOR ---
+# Las cuatro tablas de "Detalle Diario" reciben solo la página visible; el orden y los filtros de
+# la DataTable se aplican en el servidor sobre los frames guardados en la caché de resultados.
+TABLAS_DIARIAS = ['tabla-resumen-torre', 'tabla-resumen-status', 'tabla-resumen-ejecutivo-conteo', 'tabla-resumen-ejecutivo-porcentaje']
+FILAS_POR_PAGINA_TABLAS = int(os.environ.get("FILAS_POR_PAGINA_TABLAS", 20))
+PROPIEDADES_TABLA_PAGINADA = dict(
+    page_action='custom', page_current=0, page_size=FILAS_POR_PAGINA_TABLAS,
+    sort_action='custom', sort_by=[], filter_action='custom', filter_query='',
+    filter_options={'case': 'sensitive'},
+)
+
+# --- FORMATOS DE DESCARGA DE LOS DATOS DETALLADOS ---
+# Solo 'xlsx' incluye las hojas de resumen; con los demás formatos se ofrecen en un xlsx aparte
+FORMATOS_DESCARGA = {
+    'xlsx': {'opcion': "XLSX (3 hojas)", 'boton': "Descargar Archivo Completo (3 Hojas) como XLSX",
+             'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+    'csv': {'opcion': "CSV", 'boton': "Descargar Datos Detallados como CSV", 'mimetype': 'text/csv'},
+    'csv.gz': {'opcion': "CSV comprimido (.gz)", 'boton': "Descargar Datos Detallados como CSV comprimido", 'mimetype': 'application/gzip'},
+    'parquet': {'opcion': "Parquet", 'boton': "Descargar Datos Detallados como Parquet", 'mimetype': 'application/vnd.apache.parquet'},
+}
+
+
+# --- SONDEO DE CAMBIOS ---
+# Segundos mínimos entre dos sondeos de la tabla dentro del mismo proceso
+INTERVALO_SONDEO_SEGUNDOS = 30
+
+# --- DATASET COMPARTIDO ENTRE WORKERS ---
+# Con DATASET_COMPARTIDO=1 (gunicorn con varios workers, sin --preload) solo el worker que
+# obtiene el lock de cargador consulta MySQL; los demás mapean en memoria el snapshot que publica.
+DATASET_COMPARTIDO = os.environ.get("DATASET_COMPARTIDO", "0") == "1"
+
+# --- SNAPSHOT LOCAL DEL DATASET ---
+# Copia columnar (Arrow/Feather) del dataset ya preparado, para arrancar sin esperar a MySQL.
+# En modo compartido va por defecto a /dev/shm para que los workers compartan las páginas en RAM.
+_DIRECTORIO_SNAPSHOT = "/dev/shm" if DATASET_COMPARTIDO and os.path.isdir("/dev/shm") else os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+RUTA_SNAPSHOT = os.environ.get("RUTA_SNAPSHOT", os.path.join(_DIRECTORIO_SNAPSHOT, f"{NOMBRE_TABLA}.arrow"))
+
+# --- DESCARGAS EN SEGUNDO PLANO ---
+# generate_download_file corre en un proceso aparte (DiskcacheManager, sin broker externo) y deja
+# los archivos listos en DIRECTORIO_DESCARGAS. Ambos directorios deben ser los mismos para todos
+# los workers: cualquiera de ellos responde el sondeo del progreso y envía el archivo.
+DIRECTORIO_CALLBACKS = os.environ.get("DIRECTORIO_CALLBACKS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "callbacks"))
+DIRECTORIO_DESCARGAS = os.environ.get("DIRECTORIO_DESCARGAS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "descargas"))
+# Exportaciones que se escriben a la vez entre todos los workers; las demás esperan en cola
+MAX_DESCARGAS_SIMULTANEAS = int(os.environ.get("MAX_DESCARGAS_SIMULTANEAS", 2))
+# Vigencia de los archivos preparados y de sus enlaces; el archivo se borra un poco después que
+# vence el enlace, para que un enlace vigente nunca apunte a un archivo ya purgado
+DESCARGAS_PREPARADAS_TTL_SEGUNDOS = int(os.environ.get("DESCARGAS_PREPARADAS_TTL_SEGUNDOS", 3600))
+
+# --- POOL DE CONEXIONES (configurable con variables de entorno) ---
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 3600))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", 60))
+
+
 # --- 2. FUNCIÓN DE CARGA DE DATOS ---
-def cargar_datos_desde_db():
-    USUARIO = os.environ.get("USUARIO")
-    CONTRASENA = os.environ.get("CONTRASENA")
-    HOST = os.environ.get("HOST")
-    PUERTO = os.environ.get("PUERTO")
-    BASE_DE_DATOS = os.environ.get("BASE_DE_DATOS")
+_engine_db = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+_metricas_espera = {'conexiones': 0, 'espera_total_s': 0.0, 'espera_max_s': 0.0}
 
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Conectando a la base de datos en la nube...")
-    
-    cadena_conexion = f"mysql+pymysql://{USUARIO}:{CONTRASENA}@{HOST}:{PUERTO}/{BASE_DE_DATOS}"
-    engine = create_engine(
-        cadena_conexion,
-        pool_recycle=3600,
-        connect_args={'connect_timeout': 60}
-    )
 
-    with engine.connect() as connection:
-        df_dashboard = pd.read_sql_table(NOMBRE_TABLA, connection)
-    
-    print(f"Se han leído {len(df_dashboard)} filas de la base de datos.")
+def obtener_engine_db():
+    """Devuelve el engine del proceso, creándolo la primera vez que se necesita.
+
+    Si el proceso fue bifurcado (workers de gunicorn con --preload) se descarta el pool
+    heredado sin cerrar las conexiones del padre y se crea uno nuevo.
+    """
+    global _engine_db, _engine_pid
+    with _engine_lock:
+        if _engine_db is not None and _engine_pid == os.getpid():
+            return _engine_db
+        if _engine_db is not None:
+            _engine_db.dispose(close=False)
+
+        USUARIO = os.environ.get("USUARIO")
+        CONTRASENA = os.environ.get("CONTRASENA")
+        HOST = os.environ.get("HOST")
+        PUERTO = os.environ.get("PUERTO")
+        BASE_DE_DATOS = os.environ.get("BASE_DE_DATOS")
+
+        cadena_conexion = f"mysql+pymysql://{USUARIO}:{CONTRASENA}@{HOST}:{PUERTO}/{BASE_DE_DATOS}"
+        _engine_db = create_engine(
+            cadena_conexion,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True,
+            connect_args={'connect_timeout': DB_CONNECT_TIMEOUT}
+        )
+        _engine_pid = os.getpid()
+        return _engine_db
+
+
+@contextmanager
+def conexion_db():
+    """Toma una conexión del pool registrando cuánto se esperó por ella."""
+    inicio = time.perf_counter()
+    with obtener_engine_db().connect() as connection:
+        espera = time.perf_counter() - inicio
+        with _engine_lock:
+            _metricas_espera['conexiones'] += 1
+            _metricas_espera['espera_total_s'] += espera
+            _metricas_espera['espera_max_s'] = max(_metricas_espera['espera_max_s'], espera)
+        yield connection
+
+
+def obtener_metricas_pool():
+    """Estado del pool de conexiones del proceso para monitoreo."""
+    if _engine_db is None:
+        return {'pid': os.getpid(), 'pool': None}
+    pool = _engine_db.pool
+    with _engine_lock:
+        conexiones = _metricas_espera['conexiones']
+        espera_media_ms = (_metricas_espera['espera_total_s'] / conexiones * 1000) if conexiones else 0
+        espera_max_ms = _metricas_espera['espera_max_s'] * 1000
+    return {
+        'pid': os.getpid(),
+        'pool': pool.status(),
+        'tamano': pool.size(),
+        'en_uso': pool.checkedout(),
+        'disponibles': pool.checkedin(),
+        'desborde': pool.overflow(),
+        'conexiones_entregadas': conexiones,
+        'espera_media_ms': round(espera_media_ms, 2),
+        'espera_max_ms': round(espera_max_ms, 2),
+    }
 
+
+def columnas_firma(connection):
+    """Columnas del checksum: ROW_HASH si la tabla lo tiene (ya resume la fila completa) o todas.
+
+    Así cualquier cambio en una columna que se exporta en las descargas cambia la firma.
+    """
+    columnas = [columna['name'] for columna in inspect(connection).get_columns(NOMBRE_TABLA)]
+    return [COLUMNA_HASH] if COLUMNA_HASH in columnas else columnas
+
+
+def sondear_firma_tabla():
+    """Devuelve una firma barata de la tabla (filas, fecha máxima y checksum) calculada en MySQL."""
+    with conexion_db() as connection:
+        # CONCAT_WS omite los NULL: sin IFNULL, vaciar una celda podría dar el mismo texto que otra fila
+        columnas = ", ".join(f"IFNULL(`{columna}`, '<nulo>')" for columna in columnas_firma(connection))
+        consulta = text(
+            f"SELECT COUNT(*), MAX({COLUMNA_FECHA}), BIT_XOR(CRC32(CONCAT_WS('|', {columnas}))) "
+            f"FROM {NOMBRE_TABLA}"
+        )
+        filas, fecha_max, checksum = connection.execute(consulta).one()
+    return (int(filas), str(fecha_max), int(checksum or 0))
+
+
+def agregar_columnas_calendario(df):
+    """Agrega Mes (categórica), Year y Semana_Num (enteros pequeños) a cada fila.
+
+    Los valores se calculan una sola vez por día distinto y se asignan a las filas por su código de día.
+    """
+    codigos_dia, dias = pd.factorize(df[COLUMNA_FECHA].dt.normalize())
+    iso = dias.isocalendar()
+    df['Mes'] = pd.Categorical(dias.strftime('%B').str.capitalize()).take(codigos_dia)
+    df['Year'] = iso['year'].to_numpy(dtype='int16')[codigos_dia]
+    df['Semana_Num'] = iso['week'].to_numpy(dtype='int8')[codigos_dia]
+    return df
+
+
+def construir_tabla_semanas(df):
+    """Tabla de búsqueda con inicio, fin y etiqueta de cada (Year, Semana_Num) presente en df."""
+    semanas = df.groupby(['Year', 'Semana_Num'])[COLUMNA_FECHA].min().dt.normalize().reset_index()
+    semanas['WeekStartDate'] = semanas[COLUMNA_FECHA] - pd.to_timedelta(semanas[COLUMNA_FECHA].dt.dayofweek, unit='D')
+    semanas['WeekEndDate'] = semanas['WeekStartDate'] + pd.to_timedelta('6 days')
+    semanas['WeekLabel'] = "Semana " + semanas['Semana_Num'].astype(str) + " (" + semanas['WeekStartDate'].dt.strftime('%d %b') + " - " + semanas['WeekEndDate'].dt.strftime('%d %b') + ")"
+    return semanas.drop(columns=COLUMNA_FECHA).sort_values(['Semana_Num', 'Year'], ignore_index=True)
+
+
+def memoria_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def preparar_datos(df_dashboard):
+    df_dashboard = df_dashboard.drop(columns=[COLUMNA_HASH], errors='ignore')
     df_dashboard[COLUMNA_FECHA] = pd.to_datetime(df_dashboard[COLUMNA_FECHA], errors='coerce')
     df_dashboard.dropna(subset=[COLUMNA_FECHA, COLUMNA_ANALISTA, COLUMNA_TORRE, COLUMNA_STATUS], inplace=True)
-    df_dashboard = df_dashboard[df_dashboard[COLUMNA_FECHA].dt.month >= 8]
+    df_dashboard = df_dashboard[df_dashboard[COLUMNA_FECHA].dt.month >= MES_INICIAL]
     df_dashboard.sort_values(by=COLUMNA_FECHA, inplace=True)
-    df_dashboard['Mes'] = df_dashboard[COLUMNA_FECHA].dt.strftime('%B').str.capitalize()
-    df_dashboard['Year'] = df_dashboard[COLUMNA_FECHA].dt.isocalendar().year
-    df_dashboard['Semana_Num'] = df_dashboard[COLUMNA_FECHA].dt.isocalendar().week
-    df_dashboard['WeekStartDate'] = pd.to_datetime(df_dashboard['Year'].astype(str) + df_dashboard['Semana_Num'].astype(str) + '1', format='%G%V%u')
-    df_dashboard['WeekEndDate'] = df_dashboard['WeekStartDate'] + pd.to_timedelta('6 days')
-    df_dashboard['WeekLabel'] = "Semana " + df_dashboard['Semana_Num'].astype(str) + " (" + df_dashboard['WeekStartDate'].dt.strftime('%d %b') + " - " + df_dashboard['WeekEndDate'].dt.strftime('%d %b') + ")"
+    df_dashboard = df_dashboard.astype({col: 'category' for col in COLUMNAS_CATEGORICAS})
+    return agregar_columnas_calendario(df_dashboard)
+
+
+def cargar_datos_desde_db():
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Conectando a la base de datos en la nube...")
+
+    with conexion_db() as connection:
+        df_dashboard = pd.read_sql_table(NOMBRE_TABLA, connection)
     
+    print(f"Se han leído {len(df_dashboard)} filas de la base de datos.")
+    memoria_lectura = memoria_mb(df_dashboard)
+    df_dashboard = preparar_datos(df_dashboard)
+    print(f"Memoria del dataset: {memoria_lectura:.1f} MB al leer, {memoria_mb(df_dashboard):.1f} MB compactado.")
+
     return df_dashboard
 
 
+def calcular_opciones_filtros(df_fechas, torres, ejecutivos):
+    """Opciones de los dropdowns a partir de las fechas (con columnas de calendario) y las dimensiones."""
+    week_map = construir_tabla_semanas(df_fechas)
+    return {
+        'meses': sorted(df_fechas['Mes'].unique(), key=lambda m: MESES_POR_NOMBRE.get(m, 99)),
+        'semanas': week_map.apply(lambda row: {'label': row['WeekLabel'], 'value': row['Semana_Num']}, axis=1).tolist(),
+        'ejecutivos': sorted(str(e) for e in ejecutivos),
+        'torres': sorted(str(t) for t in torres),
+        'fecha_min': df_fechas[COLUMNA_FECHA].min().date(),
+        'fecha_max': df_fechas[COLUMNA_FECHA].max().date(),
+    }
+
+
+# --- CONSULTAS AGREGADAS EN MYSQL (MODO_BACKEND = 'sql') ---
+def construir_where_sql(meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio=None, fecha_fin=None):
+    """Traduce los filtros del dashboard a un WHERE parametrizado y sus parámetros."""
+    condiciones = [f"{col} IS NOT NULL" for col in [COLUMNA_FECHA, COLUMNA_ANALISTA, COLUMNA_TORRE, COLUMNA_STATUS]]
+    condiciones.append(f"MONTH({COLUMNA_FECHA}) >= :mes_inicial")
+    parametros = {'mes_inicial': MES_INICIAL}
+    listas = {}
+    if meses:
+        condiciones.append(f"MONTH({COLUMNA_FECHA}) IN :meses")
+        listas['meses'] = [MESES_POR_NOMBRE.get(m, 0) for m in meses]
+    if modo_tiempo == 'quincena' and quincena:
+        condiciones.append(f"DAY({COLUMNA_FECHA}) <= 15" if quincena == 1 else f"DAY({COLUMNA_FECHA}) > 15")
+    elif modo_tiempo == 'semana' and semanas:
+        # Modo 3 de WEEK() es la semana ISO, igual que isocalendar()
+        condiciones.append(f"WEEK({COLUMNA_FECHA}, 3) IN :semanas")
+        listas['semanas'] = [int(s) for s in semanas]
+    if torres:
+        condiciones.append(f"{COLUMNA_TORRE} IN :torres")
+        listas['torres'] = list(torres)
+    if ejecutivos:
+        condiciones.append(f"{COLUMNA_ANALISTA} IN :ejecutivos")
+        listas['ejecutivos'] = list(ejecutivos)
+    if fecha_inicio is not None:
+        condiciones.append(f"{COLUMNA_FECHA} >= :fecha_inicio AND {COLUMNA_FECHA} <= :fecha_fin")
+        parametros['fecha_inicio'] = fecha_inicio.to_pydatetime()
+        parametros['fecha_fin'] = fecha_fin.to_pydatetime()
+    parametros.update(listas)
+    return " AND ".join(condiciones), parametros, [bindparam(nombre, expanding=True) for nombre in listas]
+
+
+def consultar_cubo_db(meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    """Cubo de conteos filtrado, calculado con GROUP BY en MySQL."""
+    where, parametros, listas = construir_where_sql(meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+    consulta = text(
+        f"SELECT DATE({COLUMNA_FECHA}) AS Fecha_Dia, {COLUMNA_TORRE}, {COLUMNA_ANALISTA}, {COLUMNA_STATUS}, "
+        f"COUNT({COLUMNA_ORDEN}) AS Cantidad FROM {NOMBRE_TABLA} WHERE {where} "
+        f"GROUP BY DATE({COLUMNA_FECHA}), {COLUMNA_TORRE}, {COLUMNA_ANALISTA}, {COLUMNA_STATUS}"
+    ).bindparams(*listas)
+    with conexion_db() as connection:
+        cubo = pd.read_sql(consulta, connection, params=parametros)
+    cubo['Fecha_Dia'] = pd.to_datetime(cubo['Fecha_Dia'])
+    cubo['Mes'] = cubo['Fecha_Dia'].dt.strftime('%B').str.capitalize()
+    cubo['Semana_Num'] = cubo['Fecha_Dia'].dt.isocalendar().week.astype('int8')
+    cubo['Cantidad'] = cubo['Cantidad'].astype('int64')
+    return cubo.sort_values(COLUMNAS_CUBO)[COLUMNAS_CUBO + ['Cantidad']].reset_index(drop=True)
+
+
+def consultar_gestiones_db(meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio=None, fecha_fin=None):
+    """Gestiones que cumplen los filtros, leídas directamente de MySQL."""
+    where, parametros, listas = construir_where_sql(meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio, fecha_fin)
+    consulta = text(f"SELECT * FROM {NOMBRE_TABLA} WHERE {where}").bindparams(*listas)
+    with conexion_db() as connection:
+        df = pd.read_sql(consulta, connection, params=parametros)
+    return preparar_datos(df)
+
+
+def consultar_opciones_filtros_db():
+    """Opciones de los dropdowns con consultas DISTINCT, sin traer las gestiones."""
+    where, parametros, _ = construir_where_sql(None, None, None, None, None, None)
+    with conexion_db() as connection:
+        fechas = pd.read_sql(text(f"SELECT DISTINCT DATE({COLUMNA_FECHA}) AS {COLUMNA_FECHA} FROM {NOMBRE_TABLA} WHERE {where}"), connection, params=parametros)
+        torres = pd.read_sql(text(f"SELECT DISTINCT {COLUMNA_TORRE} FROM {NOMBRE_TABLA} WHERE {where}"), connection, params=parametros)
+        ejecutivos = pd.read_sql(text(f"SELECT DISTINCT {COLUMNA_ANALISTA} FROM {NOMBRE_TABLA} WHERE {where}"), connection, params=parametros)
+    fechas[COLUMNA_FECHA] = pd.to_datetime(fechas[COLUMNA_FECHA])
+    return calcular_opciones_filtros(agregar_columnas_calendario(fechas), torres[COLUMNA_TORRE], ejecutivos[COLUMNA_ANALISTA])
+
+
+# --- CUBO DE CONTEOS ---
+# Todas las tablas, tarjetas, gráficos y rankings se derivan de este cubo, que tiene una
+# fila por (día, torre, ejecutivo, status) en lugar de una fila por gestión.
+COLUMNAS_CUBO = ['Fecha_Dia', 'Mes', 'Semana_Num', COLUMNA_TORRE, COLUMNA_ANALISTA, COLUMNA_STATUS]
+
+
+def construir_cubo(df):
+    """Agrega las gestiones a nivel (día, torre, ejecutivo, status) con su cantidad.
+
+    Las dimensiones del cubo quedan como texto, igual que en el cubo que devuelve MySQL.
+    """
+    claves = [df[COLUMNA_FECHA].dt.normalize().rename('Fecha_Dia')] + [df[col] for col in COLUMNAS_CUBO[1:]]
+    cubo = df.groupby(claves, observed=True)[COLUMNA_ORDEN].count().reset_index(name='Cantidad')
+    return cubo.astype({col: object for col in COLUMNAS_CATEGORICAS + ['Mes']})
+
+
+# --- ÍNDICE DE FILTROS ---
+# Para cada dimensión filtrable se guardan, por valor, las posiciones de las filas que lo tienen.
+# Se construye una vez por versión de datos (para las gestiones y para el cubo) y cada
+# combinación de filtros se resuelve cruzando posiciones y haciendo un único take.
+# Las posiciones se guardan como int32 (la mitad de memoria que int64) mientras las filas quepan.
+_SIN_POSICIONES = np.empty(0, dtype=np.int32)
+
+
+def _posiciones_por_valor(valores):
+    codigos, unicos = pd.factorize(valores)
+    orden = np.argsort(codigos, kind='stable')
+    if len(orden) <= np.iinfo(np.int32).max:
+        orden = orden.astype(np.int32)
+    cortes = np.cumsum(np.bincount(codigos[codigos >= 0], minlength=len(unicos)))[:-1]
+    # El orden estable deja las posiciones de cada valor ya ordenadas
+    grupos = np.split(orden[np.count_nonzero(codigos < 0):], cortes)
+    return dict(zip(pd.Index(unicos).tolist(), grupos))
+
+
+def construir_indice_filtros(df, columna_fecha):
+    """Posiciones de fila por valor de cada filtro (mes, quincena, semana, torre y ejecutivo)."""
+    if df is None or df.empty:
+        return None
+    quincenas = np.where(df[columna_fecha].dt.day.to_numpy() <= 15, 1, 2)
+    return {
+        'filas': len(df),
+        'Mes': _posiciones_por_valor(df['Mes']),
+        'Quincena': _posiciones_por_valor(quincenas),
+        'Semana_Num': _posiciones_por_valor(df['Semana_Num']),
+        COLUMNA_TORRE: _posiciones_por_valor(df[COLUMNA_TORRE]),
+        COLUMNA_ANALISTA: _posiciones_por_valor(df[COLUMNA_ANALISTA]),
+    }
+
+
+def aplicar_filtros(df, indice, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    """Aplica los filtros del dashboard a las gestiones o al cubo usando su índice de filtros."""
+    if indice is None:
+        return df
+    seleccion = [('Mes', meses)]
+    if modo_tiempo == 'quincena' and quincena:
+        seleccion.append(('Quincena', [quincena]))
+    elif modo_tiempo == 'semana' and semanas:
+        seleccion.append(('Semana_Num', semanas))
+    seleccion += [(COLUMNA_TORRE, torres), (COLUMNA_ANALISTA, ejecutivos)]
+
+    posiciones = None
+    for dimension, valores in seleccion:
+        if not valores:
+            continue
+        grupos = [indice[dimension].get(valor, _SIN_POSICIONES) for valor in valores]
+        if posiciones is None:
+            # Los grupos de una misma dimensión son disjuntos: basta concatenar y ordenar
+            posiciones = np.sort(np.concatenate(grupos))
+        else:
+            mascara = np.zeros(indice['filas'], dtype=bool)
+            for grupo in grupos:
+                mascara[grupo] = True
+            posiciones = posiciones[mascara[posiciones]]
+    if posiciones is None:
+        return df
+    return df.take(posiciones)
+
+
+# --- CACHÉ DE DATOS EN EL SERVIDOR ---
+# El DataFrame vive en memoria del proceso y el navegador solo guarda el token de versión.
+VERSIONES_EN_CACHE = 2
+_cache_dataset = {}
+_cache_version_actual = None
+_cache_lock = threading.Lock()
+
+
+def publicar_dataset(df, opciones=None):
+    """Guarda el DataFrame, su cubo y las opciones de filtros en la caché del proceso.
+
+    Devuelve el token de versión. En MODO_BACKEND 'sql' no hay DataFrame (df es None) y solo
+    se publican las opciones, consultadas a MySQL.
+    """
+    global _cache_version_actual
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    if df is None:
+        entrada = {'df': None, 'cubo': None, 'opciones': opciones, 'indice_df': None, 'indice_cubo': None}
+    else:
+        opciones = calcular_opciones_filtros(df, df[COLUMNA_TORRE].unique(), df[COLUMNA_ANALISTA].unique())
+        cubo = construir_cubo(df)
+        entrada = {
+            'df': df, 'cubo': cubo, 'opciones': opciones,
+            'indice_df': construir_indice_filtros(df, COLUMNA_FECHA),
+            'indice_cubo': construir_indice_filtros(cubo, 'Fecha_Dia'),
+        }
+    with _cache_lock:
+        _cache_dataset[version] = entrada
+        _cache_version_actual = version
+        # Se conservan algunas versiones anteriores para las peticiones que aún las usan
+        for version_antigua in list(_cache_dataset)[:-VERSIONES_EN_CACHE]:
+            del _cache_dataset[version_antigua]
+        versiones_vigentes = set(_cache_dataset)
+    invalidar_resultados(versiones_vigentes)
+    return version
+
+
+def resolver_version(version):
+    """Versión que realmente se usará para el token recibido (la más reciente si ya no existe)."""
+    with _cache_lock:
+        return version if version in _cache_dataset else _cache_version_actual
+
+
+def _obtener_entrada(version):
+    with _cache_lock:
+        if version in _cache_dataset:
+            return _cache_dataset[version]
+        return _cache_dataset.get(_cache_version_actual, {'df': pd.DataFrame(), 'cubo': pd.DataFrame(), 'opciones': None, 'indice_df': None, 'indice_cubo': None})
+
+
+def obtener_opciones(version=None):
+    """Devuelve las opciones de los filtros de la versión pedida o, si ya no existe, de la más reciente."""
+    return _obtener_entrada(version)['opciones']
+
+
+def obtener_cubo_filtrado(version, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    if MODO_BACKEND == 'sql':
+        return consultar_cubo_db(meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+    entrada = _obtener_entrada(version)
+    return aplicar_filtros(entrada['cubo'], entrada['indice_cubo'], meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+
+
+def obtener_gestiones_filtradas(version, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio=None, fecha_fin=None):
+    if MODO_BACKEND == 'sql':
+        return consultar_gestiones_db(meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio, fecha_fin)
+    entrada = _obtener_entrada(version)
+    dff = aplicar_filtros(entrada['df'], entrada['indice_df'], meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+    # Sin versión cargada en este proceso el frame no tiene columnas
+    if dff.empty:
+        return dff
+    if fecha_inicio is not None:
+        dff = dff[(dff[COLUMNA_FECHA] >= fecha_inicio) & (dff[COLUMNA_FECHA] <= fecha_fin)]
+    return dff
+
+
+# --- SNAPSHOT LOCAL ---
+def guardar_snapshot(df, firma, hora_carga):
+    """Escribe el dataset preparado como archivo Arrow/Feather, etiquetado con la firma de la tabla.
+
+    Se escribe en un archivo temporal y se reemplaza de forma atómica, para que otro proceso
+    nunca lea un snapshot a medio escribir.
+    """
+    tabla = pa.Table.from_pandas(df)
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[b'firma'] = json.dumps(list(firma)).encode()
+    metadatos[b'hora_carga'] = hora_carga.isoformat().encode()
+    os.makedirs(os.path.dirname(RUTA_SNAPSHOT), exist_ok=True)
+    ruta_temporal = f"{RUTA_SNAPSHOT}.{os.getpid()}.tmp"
+    # Sin compresión para poder leerlo con memory map
+    feather.write_feather(tabla.replace_schema_metadata(metadatos), ruta_temporal, compression='uncompressed')
+    os.replace(ruta_temporal, RUTA_SNAPSHOT)
+
+
+def cargar_snapshot():
+    """Lee el snapshot local (con memory map) y devuelve (df, firma, hora_carga), o None si no hay."""
+    if not os.path.exists(RUTA_SNAPSHOT):
+        return None
+    try:
+        tabla = feather.read_table(RUTA_SNAPSHOT, memory_map=True)
+        metadatos = tabla.schema.metadata
+        firma = tuple(json.loads(metadatos[b'firma']))
+        hora_carga = datetime.fromisoformat(metadatos[b'hora_carga'].decode())
+        # split_blocks evita consolidar columnas: las numéricas, las de fecha y los códigos de las
+        # categóricas quedan apuntando al archivo mapeado en lugar de copiarse
+        return tabla.to_pandas(split_blocks=True), firma, hora_carga
+    except Exception as e:
+        print(f"Advertencia: no se pudo leer el snapshot local {RUTA_SNAPSHOT}: {e}")
+        return None
+
+
+_estado_refresco = {'firma': None, 'ultimo_sondeo': 0.0, 'hora_carga': None, 'archivo': None}
+_refresco_lock = threading.Lock()
+_lock_cargador = {'archivo': None, 'pid': None}
+
+
+def es_proceso_cargador():
+    """True si este proceso es el que consulta MySQL (siempre, salvo en modo compartido).
+
+    En modo compartido el primer worker que toma el flock sobre RUTA_SNAPSHOT.lock lo conserva
+    mientras viva; si muere, el sistema libera el lock y otro worker lo toma en su siguiente sondeo.
+    """
+    if not DATASET_COMPARTIDO:
+        return True
+    if _lock_cargador['pid'] == os.getpid():
+        return True
+    os.makedirs(os.path.dirname(RUTA_SNAPSHOT), exist_ok=True)
+    archivo = open(f"{RUTA_SNAPSHOT}.lock", 'a')
+    try:
+        fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        archivo.close()
+        return False
+    _lock_cargador.update(archivo=archivo, pid=os.getpid())
+    print(f"Worker {os.getpid()}: cargador del dataset compartido.")
+    return True
+
+
+def _publicar_snapshot():
+    """Publica el snapshot si cambió desde la última vez que este proceso lo publicó.
+
+    Debe llamarse con _refresco_lock tomado. Devuelve la versión vigente (None si no hay datos).
+    """
+    try:
+        estado_archivo = os.stat(RUTA_SNAPSHOT)
+    except FileNotFoundError:
+        return _cache_version_actual
+    marca = (estado_archivo.st_ino, estado_archivo.st_mtime_ns)
+    if _cache_version_actual and marca == _estado_refresco['archivo']:
+        return _cache_version_actual
+    snapshot = cargar_snapshot()
+    if snapshot is None:
+        return _cache_version_actual
+    df, firma, hora_carga = snapshot
+    version = publicar_dataset(df)
+    _estado_refresco.update(firma=firma, hora_carga=hora_carga, archivo=marca)
+    print(f"Dataset cargado desde el snapshot local ({len(df)} filas, datos de {hora_carga.strftime('%d/%m/%Y %H:%M:%S')}).")
+    return version
+
+
+def publicar_snapshot_local():
+    """Publica el snapshot local como versión inicial, sin consultar MySQL.
+
+    Devuelve el token de versión, o None si no hay snapshot (o en MODO_BACKEND 'sql'). La
+    firma queda registrada para que el siguiente sondeo solo recargue si la tabla cambió.
+    """
+    if MODO_BACKEND == 'sql':
+        return None
+    with _refresco_lock:
+        version = _publicar_snapshot()
+        _estado_refresco['ultimo_sondeo'] = 0.0
+    return version
+
+
+def refrescar_dataset_si_cambio():
+    """Sondea la tabla y solo la recarga completa si su firma cambió.
+
+    Solo la llaman los hilos de fondo (carga inicial y _mantener_dataset); los callbacks leen la
+    versión publicada y nunca esperan una recarga. El sondeo se hace como máximo una vez cada
+    INTERVALO_SONDEO_SEGUNDOS por proceso. En modo compartido, los workers que no son el
+    cargador solo miran si hay un snapshot nuevo.
+    """
+    with _refresco_lock:
+        if MODO_BACKEND != 'sql' and not es_proceso_cargador():
+            return _publicar_snapshot()
+        ahora = time.monotonic()
+        if _cache_version_actual and ahora - _estado_refresco['ultimo_sondeo'] < INTERVALO_SONDEO_SEGUNDOS:
+            return _cache_version_actual
+        _estado_refresco['ultimo_sondeo'] = ahora
+        firma = sondear_firma_tabla()
+        if _cache_version_actual and firma == _estado_refresco['firma']:
+            return _cache_version_actual
+        hora_carga = datetime.now()
+        if MODO_BACKEND == 'sql':
+            version = publicar_dataset(None, consultar_opciones_filtros_db())
+        else:
+            df = cargar_datos_desde_db()
+            version = publicar_dataset(df)
+            try:
+                guardar_snapshot(df, firma, hora_carga)
+                estado_archivo = os.stat(RUTA_SNAPSHOT)
+                _estado_refresco['archivo'] = (estado_archivo.st_ino, estado_archivo.st_mtime_ns)
+            except Exception as e:
+                print(f"Advertencia: no se pudo guardar el snapshot local: {e}")
+        _estado_refresco['firma'] = firma
+        _estado_refresco['hora_carga'] = hora_carga
+        return version
+
+
+# --- CACHÉ DE RESULTADOS (LRU) ---
+# Resultados ya calculados del dashboard por (versión de datos, filtros normalizados).
+CACHE_RESULTADOS_MAX_ENTRADAS = int(os.environ.get("CACHE_RESULTADOS_MAX_ENTRADAS", 64))
+CACHE_RESULTADOS_MAX_MB = float(os.environ.get("CACHE_RESULTADOS_MAX_MB", 256))
+_cache_resultados = OrderedDict()
+_cache_resultados_lock = threading.Lock()
+_metricas_resultados = {'aciertos': 0, 'fallos': 0, 'desalojos': 0, 'bytes': 0}
+
+
+def normalizar_filtros(meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    """Tupla canónica de filtros: sin orden en las listas y sin los filtros que el modo ignora."""
+    if modo_tiempo == 'quincena' and quincena:
+        filtro_tiempo = ('quincena', quincena)
+    elif modo_tiempo == 'semana' and semanas:
+        filtro_tiempo = ('semana', tuple(sorted(semanas)))
+    else:
+        filtro_tiempo = None
+    return (tuple(sorted(meses or [])), filtro_tiempo, tuple(sorted(torres or [])), tuple(sorted(ejecutivos or [])))
+
+
+def leer_resultado(clave):
+    with _cache_resultados_lock:
+        if clave in _cache_resultados:
+            _cache_resultados.move_to_end(clave)
+            _metricas_resultados['aciertos'] += 1
+            return _cache_resultados[clave][0]
+        _metricas_resultados['fallos'] += 1
+        return None
+
+
+def guardar_resultado(clave, resultado, tamano=None):
+    # Por defecto el tamaño se estima con el JSON que Dash enviaría al navegador
+    if tamano is None:
+        tamano = len(json.dumps(resultado, cls=PlotlyJSONEncoder))
+    with _cache_resultados_lock:
+        if clave in _cache_resultados:
+            _metricas_resultados['bytes'] -= _cache_resultados.pop(clave)[1]
+        _cache_resultados[clave] = (resultado, tamano)
+        _metricas_resultados['bytes'] += tamano
+        while _cache_resultados and (len(_cache_resultados) > CACHE_RESULTADOS_MAX_ENTRADAS
+                                     or _metricas_resultados['bytes'] > CACHE_RESULTADOS_MAX_MB * 1024 ** 2):
+            _, (_, tamano_desalojado) = _cache_resultados.popitem(last=False)
+            _metricas_resultados['bytes'] -= tamano_desalojado
+            _metricas_resultados['desalojos'] += 1
+
+
+def invalidar_resultados(versiones_vigentes):
+    """Descarta los resultados de versiones de datos que ya no están en la caché."""
+    with _cache_resultados_lock:
+        for clave in [c for c in _cache_resultados if c[0] not in versiones_vigentes]:
+            _metricas_resultados['bytes'] -= _cache_resultados.pop(clave)[1]
+
+
+def obtener_metricas_resultados():
+    with _cache_resultados_lock:
+        consultas = _metricas_resultados['aciertos'] + _metricas_resultados['fallos']
+        return {
+            'pid': os.getpid(),
+            'entradas': len(_cache_resultados),
+            'mb': round(_metricas_resultados['bytes'] / 1024 ** 2, 2),
+            'aciertos': _metricas_resultados['aciertos'],
+            'fallos': _metricas_resultados['fallos'],
+            'desalojos': _metricas_resultados['desalojos'],
+            'tasa_aciertos': round(_metricas_resultados['aciertos'] / consultas, 3) if consultas else 0,
+        }
+
+
 # --- 3. INICIALIZACIÓN DE LA APLICACIÓN DASH ---
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUX, dbc.icons.BOOTSTRAP], suppress_callback_exceptions=True)
+# DiskcacheManager lanza cada trabajo con fork. Si en ese momento otro hilo (carga inicial, sondeo,
+# otra petición) tuviera tomado un lock, el hijo lo heredaría tomado y se quedaría bloqueado para
+# siempre ocupando un turno de descarga. Los locks de secciones cortas se toman alrededor del fork;
+# el de refresco puede durar una recarga completa y el hijo no lo usa, así que se reemplaza en él.
+def _locks_alrededor_del_fork():
+    return (_carga_inicial_lock, _engine_lock, _cache_lock, _cache_resultados_lock)
+
+
+def _antes_del_fork():
+    for lock in _locks_alrededor_del_fork():
+        lock.acquire()
+
+
+def _despues_del_fork_padre():
+    for lock in reversed(_locks_alrededor_del_fork()):
+        lock.release()
+
+
+def _despues_del_fork_hijo():
+    global _refresco_lock
+    _refresco_lock = threading.Lock()
+    _despues_del_fork_padre()
+
+
+os.register_at_fork(before=_antes_del_fork, after_in_parent=_despues_del_fork_padre, after_in_child=_despues_del_fork_hijo)
+
+# Los resultados y el progreso de los background callbacks se guardan en disco, compartidos entre workers
+gestor_callbacks = DiskcacheManager(diskcache.Cache(DIRECTORIO_CALLBACKS), expire=DESCARGAS_PREPARADAS_TTL_SEGUNDOS)
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.LUX, dbc.icons.BOOTSTRAP], suppress_callback_exceptions=True,
+                background_callback_manager=gestor_callbacks)
 server = app.server
-server.secret_key = os.environ.get('SECRET_KEY', os.urandom(24))
+# Una sola clave firma la cookie de sesión y los enlaces de descarga; debe ser la misma en todos
+# los workers y sobrevivir a los reinicios, así que en producción SECRET_KEY es obligatoria
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    print("Advertencia: SECRET_KEY no está definida; se usa una clave aleatoria de este proceso. "
+          "Los enlaces de descarga y las sesiones no servirán en otros workers ni tras reiniciar.")
+    SECRET_KEY = os.urandom(32).hex()
+server.secret_key = SECRET_KEY
 auth = dash_auth.BasicAuth(app, VALID_USERNAME_PASSWORD_PAIRS)
 
-# --- Carga inicial de datos ---
-try:
-    df_principal = cargar_datos_desde_db()
-    meses_disponibles = sorted(df_principal['Mes'].unique(), key=lambda m: pd.to_datetime(f'01-{m}-2025', format='%d-%B-%Y').month)
-    week_map = df_principal[['Semana_Num', 'WeekLabel']].drop_duplicates().sort_values('Semana_Num')
-    semanas_disponibles_options = week_map.apply(lambda row: {'label': row['WeekLabel'], 'value': row['Semana_Num']}, axis=1).tolist()
-    ejecutivos_disponibles = sorted(df_principal[COLUMNA_ANALISTA].unique())
-    torres_disponibles = sorted(df_principal[COLUMNA_TORRE].unique())
-    datos_cargados_correctamente = True
-    initial_load_time_str = f"Datos cargados desde DB a las: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-except Exception as e:
-    error_mensaje = f"Ocurrió un error crítico durante la carga inicial de datos: {e}"
-    datos_cargados_correctamente = False
-    df_principal = pd.DataFrame()
-    initial_load_time_str = "Error al cargar datos."
-    traceback.print_exc()
+
+@server.route('/metricas/pool')
+def metricas_pool():
+    return jsonify(obtener_metricas_pool())
+
+
+@server.route('/metricas/cache')
+def metricas_cache():
+    return jsonify(obtener_metricas_resultados())
+
+
+# --- Carga inicial de datos (en segundo plano) ---
+# El layout se sirve de inmediato con un aviso de carga; las opciones de los filtros se
+# completan por callback cuando el hilo publica la primera versión del dataset.
+_estado_carga_inicial = {'estado': 'pendiente', 'error': None, 'hilo': None, 'hilo_sondeo': None}
+_carga_inicial_lock = threading.Lock()
+
+
+def _ejecutar_carga_inicial():
+    try:
+        # Si hay snapshot local se publica primero y la tabla se revalida justo después
+        if publicar_snapshot_local() is not None:
+            _estado_carga_inicial['estado'] = 'lista'
+        refrescar_dataset_si_cambio()
+        _estado_carga_inicial['estado'] = 'lista'
+    except Exception as e:
+        print(f"Ocurrió un error crítico durante la carga inicial de datos: {e}")
+        traceback.print_exc()
+        # Con el snapshot ya publicado el dashboard sigue funcionando con esos datos
+        if _cache_version_actual is None:
+            _estado_carga_inicial['error'] = str(e)
+            _estado_carga_inicial['estado'] = 'error'
+
+
+def _mantener_dataset():
+    """Sondea en segundo plano y publica cada versión nueva del dataset.
+
+    Es lo único que recarga después de la carga inicial, así una recarga larga no deja esperando
+    a los workers que atienden las pestañas. En modo compartido, además, el cargador detecta los
+    cambios de la tabla y los demás workers adoptan cada snapshot nuevo aunque no reciban peticiones.
+    """
+    while True:
+        time.sleep(INTERVALO_SONDEO_SEGUNDOS)
+        try:
+            refrescar_dataset_si_cambio()
+        except Exception as e:
+            print(f"Error al refrescar el dataset: {e}")
+
+
+def iniciar_carga_inicial():
+    """Lanza la carga inicial en un hilo, salvo que ya haya datos publicados o una carga en curso.
+
+    También arranca el hilo de sondeo si este proceso no lo tiene (los hilos no pasan a un fork).
+    """
+    with _carga_inicial_lock:
+        hilo_sondeo = _estado_carga_inicial['hilo_sondeo']
+        if hilo_sondeo is None or not hilo_sondeo.is_alive():
+            _estado_carga_inicial['hilo_sondeo'] = threading.Thread(target=_mantener_dataset, name='sondeo-dataset', daemon=True)
+            _estado_carga_inicial['hilo_sondeo'].start()
+        hilo = _estado_carga_inicial['hilo']
+        if _cache_version_actual is not None or (hilo is not None and hilo.is_alive()):
+            return
+        _estado_carga_inicial.update(estado='pendiente', error=None)
+        hilo = threading.Thread(target=_ejecutar_carga_inicial, name='carga-inicial', daemon=True)
+        _estado_carga_inicial['hilo'] = hilo
+        hilo.start()
+
+
+def aviso_carga():
+    """Contenido del aviso de carga según el estado de la carga inicial."""
+    if _estado_carga_inicial['estado'] == 'error':
+        return dbc.Alert(f"Ocurrió un error crítico durante la carga inicial de datos: {_estado_carga_inicial['error']}", color="danger", className="mt-2")
+    if _cache_version_actual is None:
+        return dbc.Alert([dbc.Spinner(size="sm", spinner_class_name="me-2"), "Cargando datos desde la base de datos..."], color="info", className="mt-2 d-flex align-items-center")
+    return []
+
+
+def texto_ultima_carga():
+    if _estado_refresco['hora_carga'] is None:
+        return "Error al cargar datos." if _estado_carga_inicial['estado'] == 'error' else "Cargando datos..."
+    return f"Datos cargados desde DB a las: {_estado_refresco['hora_carga'].strftime('%d/%m/%Y %H:%M:%S')}"
+
+
+iniciar_carga_inicial()
 
 
 # --- 4. DISEÑO DE LA APLICACIÓN WEB (LAYOUT) ---
-if datos_cargados_correctamente:
-    app.layout = dbc.Container([
-        dcc.Store(id='store-main-data', data=df_principal.to_json(date_format='iso', orient='split')),
+def construir_layout():
+    """Layout por petición: con los datos ya cargados o con el aviso de carga mientras tanto."""
+    # Si la carga inicial falló, recargar la página la vuelve a intentar
+    iniciar_carga_inicial()
+    cargando = _cache_version_actual is None
+    return dbc.Container([
+        dcc.Store(id='store-main-data', data=_cache_version_actual),
+        # Sesión del navegador para la que se firman los enlaces de la pestaña Descargar
+        dcc.Store(id='store-sesion', data=id_sesion() if has_request_context() else None),
         dcc.Interval(id='interval-component', interval=60 * 1000, n_intervals=0),
-        dcc.Download(id="download-excel"),
-        dcc.Store(id='store-resumen-conteo-data'),
-        dcc.Store(id='store-resumen-porcentaje-data'),
-        dcc.Store(id='store-download-raw-data'),
-        dcc.Store(id='store-kpi-resolutividad-data'),
-        dcc.Store(id='store-kpi-cantidad-data'),
-        dcc.Store(id='store-filtered-data'), 
-        
+        dcc.Interval(id='interval-carga', interval=1000, n_intervals=0, disabled=not cargando),
+        # Renueva el enlace firmado del ranking antes de que venza, aunque la vista no cambie
+        dcc.Interval(id='interval-enlace-ranking', interval=DESCARGA_VIGENCIA_SEGUNDOS * 1000 // 2, n_intervals=0),
+        dcc.Store(id='store-clave-tab-mensual'),
+        dcc.Store(id='store-clave-tab-diario'),
+        dcc.Store(id='store-clave-tab-graficos'),
+        dcc.Store(id='store-clave-tab-ranking'),
+        *([dcc.Store(id='store-agregados'), dcc.Store(id='store-clave-agregados'), dcc.Store(id='store-config-cliente', data=configuracion_cliente())] if MODO_RENDER == 'cliente' else []),
+
         dbc.Row(dbc.Col(html.H1("Dashboard Consolidado FullStack", className="text-center text-primary my-4"))),
+        html.Div(id='aviso-carga', children=aviso_carga()),
         dbc.Card(dbc.CardBody([
              dbc.Row([
-                dbc.Col(dcc.Dropdown(id='filtro-mes', options=meses_disponibles, placeholder="Seleccionar Mes(es)", multi=True, className="dbc"), md=3),
+                dbc.Col(dcc.Dropdown(id='filtro-mes', options=[], placeholder="Seleccionar Mes(es)", multi=True, className="dbc"), md=3),
                 dbc.Col([
                     html.Label("Filtrar por:", style={'fontWeight': 'bold'}, className="mb-1"),
                     dcc.RadioItems(id='modo-filtro-tiempo', options=[{'label': ' Quincena', 'value': 'quincena'}, {'label': ' Semana', 'value': 'semana'}], value='quincena', inline=True, labelStyle={'margin-right': '10px'}),
                     html.Div(id='contenedor-filtro-quincena', children=[dcc.Dropdown(id='filtro-quincena', options=[{'label': '1ra Quincena', 'value': 1}, {'label': '2da Quincena', 'value': 2}], placeholder="Seleccionar Quincena", className="mt-1 dbc")]),
-                    html.Div(id='contenedor-filtro-semana', children=[dcc.Dropdown(id='filtro-semana', options=semanas_disponibles_options, placeholder="Seleccionar Semana(s)", multi=True, className="mt-1 dbc")], style={'display': 'none'})
+                    html.Div(id='contenedor-filtro-semana', children=[dcc.Dropdown(id='filtro-semana', options=[], placeholder="Seleccionar Semana(s)", multi=True, className="mt-1 dbc")], style={'display': 'none'})
                 ], md=3),
-                dbc.Col(dcc.Dropdown(id='filtro-torre', options=torres_disponibles, placeholder="Seleccionar Torre(s)", multi=True, className="dbc"), md=3),
-                dbc.Col(dcc.Dropdown(id='filtro-ejecutivo', options=ejecutivos_disponibles, placeholder="Seleccionar Ejecutivo(s)", multi=True, className="dbc"), md=3),
+                dbc.Col(dcc.Dropdown(id='filtro-torre', options=[], placeholder="Seleccionar Torre(s)", multi=True, className="dbc"), md=3),
+                dbc.Col(dcc.Dropdown(id='filtro-ejecutivo', options=[], placeholder="Seleccionar Ejecutivo(s)", multi=True, className="dbc"), md=3),
             ]),
             dbc.Row(dbc.Col(dbc.Button("Limpiar Filtros", id="btn-limpiar", color="secondary", outline=True, className="w-100 mt-3"), width=12))
         ]), className="mb-4 shadow-sm"),
 
         dbc.Tabs([
-            dbc.Tab(label="Resumen Mensual", children=[dbc.Row(id='tarjetas-kpi-mensual', className="my-4 g-4"), dbc.Row([dbc.Col([html.H4("Resumen Mensual por Torre y Ejecutivo", className="border-bottom pb-2 mb-3 text-info"), dash_table.DataTable(id='tabla-resumen-mensual', style_header={'backgroundColor': '#E0E6F8', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'padding': '8px'}, style_data_conditional=[{'if': {'filter_query': '{Tipo} = "Torre"'}, 'backgroundColor': '#C0D9EE', 'fontWeight': 'bold'},{'if': {'column_id': 'Etiquetas de Fila'}, 'textAlign': 'left', 'fontWeight': 'bold'},{'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#E0E6F8'}], export_format="xlsx", export_headers="display")], width=12)], className="mb-4")]),
-            dbc.Tab(label="Detalle Diario", children=[dbc.Row(id='tarjetas-kpi-diario', className="my-4 g-4"), dbc.Row([dbc.Col([html.H4("Resumen Diario por Torre", className="border-bottom pb-2 my-3 text-success"), dash_table.DataTable(id='tabla-resumen-torre', style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#e8f5e9', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_TORRE}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#e8f5e9'}], style_data_conditional=[{'if': {'filter_query': f'{{{COLUMNA_TORRE}}} = "Total General"'},'backgroundColor': '#d4edda','fontWeight': 'bold'}], export_format="xlsx", export_headers="display")], width=12)], className="mb-4"), dbc.Row([dbc.Col([html.H4("Resumen Diario por Status", className="border-bottom pb-2 mb-3 text-warning"), dash_table.DataTable(id='tabla-resumen-status', style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#fff3e0', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_STATUS}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#fff3e0'}], style_data_conditional=[{'if': {'filter_query': f'{{{COLUMNA_STATUS}}} = "Total General"'},'backgroundColor': '#ffecb3','fontWeight': 'bold'}], export_format="xlsx", export_headers="display")], width=12)], className="mb-4"), dbc.Row([dbc.Col([html.H4("Resumen Diario por Ejecutivo (Cantidad)", className="border-bottom pb-2 mb-3 text-info"), dash_table.DataTable(id='tabla-resumen-ejecutivo-conteo', style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#f2e3fd', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_ANALISTA}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#f2e3fd'}], style_data_conditional=[{'if': {'filter_query': f'{{{COLUMNA_ANALISTA}}} = "Total General"'},'backgroundColor': '#e3d0fa','fontWeight': 'bold'}], export_format="xlsx", export_headers="display")], width=12)], className="mb-4"), dbc.Row([dbc.Col([html.H4("Porcentaje de Resolutividad Diario por Ejecutivo", className="border-bottom pb-2 mb-3 text-primary"), dash_table.DataTable(id='tabla-resumen-ejecutivo-porcentaje', style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#e3f2fd'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_ANALISTA}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#e3f2fd'}])], width=12)], className="mb-4")]),
-            dbc.Tab(label="Gráficos", children=[dbc.Row(id='tarjetas-kpi-graficos', className="my-4 g-4"), dbc.Row([dbc.Col(dbc.Card(dcc.Graph(id='grafico-torta-torre'), className="shadow-sm"), md=6), dbc.Col(dbc.Card(dcc.Graph(id='grafico-barras-resolutividad'), className="shadow-sm"), md=6)], className="my-4"), dbc.Row([dbc.Col(dbc.Card(dcc.Graph(id='grafico-volumen-ejecutivo'), className="shadow-sm"), md=6), dbc.Col(dbc.Card(dcc.Graph(id='grafico-composicion-status'), className="shadow-sm"), md=6)], className="my-4")]),
-            dbc.Tab(label="Ranking KPI", children=[
+            dbc.Tab(label="Resumen Mensual", tab_id=TAB_MENSUAL, children=[dbc.Row(id='tarjetas-kpi-mensual', className="my-4 g-4"), dbc.Row([dbc.Col([html.H4("Resumen Mensual por Torre y Ejecutivo", className="border-bottom pb-2 mb-3 text-info"), dash_table.DataTable(id='tabla-resumen-mensual', style_header={'backgroundColor': '#E0E6F8', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'padding': '8px'}, style_data_conditional=[{'if': {'filter_query': '{Tipo} = "Torre"'}, 'backgroundColor': '#C0D9EE', 'fontWeight': 'bold'},{'if': {'column_id': 'Etiquetas de Fila'}, 'textAlign': 'left', 'fontWeight': 'bold'},{'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#E0E6F8'}], export_format="xlsx", export_headers="display")], width=12)], className="mb-4")]),
+            dbc.Tab(label="Detalle Diario", tab_id=TAB_DIARIO, children=[dbc.Row(id='tarjetas-kpi-diario', className="my-4 g-4"), dbc.Row([dbc.Col([html.H4("Resumen Diario por Torre", className="border-bottom pb-2 my-3 text-success"), dash_table.DataTable(id='tabla-resumen-torre', **PROPIEDADES_TABLA_PAGINADA, style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#e8f5e9', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_TORRE}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#e8f5e9'}], style_data_conditional=[{'if': {'filter_query': f'{{{COLUMNA_TORRE}}} = "Total General"'},'backgroundColor': '#d4edda','fontWeight': 'bold'}], export_format="xlsx", export_headers="display"), html.Div(id='aviso-filtro-tabla-resumen-torre', className="text-danger small mt-1")], width=12)], className="mb-4"), dbc.Row([dbc.Col([html.H4("Resumen Diario por Status", className="border-bottom pb-2 mb-3 text-warning"), dash_table.DataTable(id='tabla-resumen-status', **PROPIEDADES_TABLA_PAGINADA, style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#fff3e0', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_STATUS}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#fff3e0'}], style_data_conditional=[{'if': {'filter_query': f'{{{COLUMNA_STATUS}}} = "Total General"'},'backgroundColor': '#ffecb3','fontWeight': 'bold'}], export_format="xlsx", export_headers="display"), html.Div(id='aviso-filtro-tabla-resumen-status', className="text-danger small mt-1")], width=12)], className="mb-4"), dbc.Row([dbc.Col([html.H4("Resumen Diario por Ejecutivo (Cantidad)", className="border-bottom pb-2 mb-3 text-info"), dash_table.DataTable(id='tabla-resumen-ejecutivo-conteo', **PROPIEDADES_TABLA_PAGINADA, style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#f2e3fd', 'fontWeight': 'bold', 'textAlign': 'center'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_ANALISTA}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#f2e3fd'}], style_data_conditional=[{'if': {'filter_query': f'{{{COLUMNA_ANALISTA}}} = "Total General"'},'backgroundColor': '#e3d0fa','fontWeight': 'bold'}], export_format="xlsx", export_headers="display"), html.Div(id='aviso-filtro-tabla-resumen-ejecutivo-conteo', className="text-danger small mt-1")], width=12)], className="mb-4"), dbc.Row([dbc.Col([html.H4("Porcentaje de Resolutividad Diario por Ejecutivo", className="border-bottom pb-2 mb-3 text-primary"), dash_table.DataTable(id='tabla-resumen-ejecutivo-porcentaje', **PROPIEDADES_TABLA_PAGINADA, style_table={'overflowX': 'auto'}, style_header={'backgroundColor': '#e3f2fd'}, style_cell={'textAlign': 'center', 'minWidth': '120px', 'padding': '8px'}, style_cell_conditional=[{'if': {'column_id': COLUMNA_ANALISTA}, 'textAlign': 'left', 'fontWeight': 'bold', 'minWidth': '180px'}, {'if': {'column_id': 'Total General'}, 'fontWeight': 'bold', 'backgroundColor': '#e3f2fd'}]), html.Div(id='aviso-filtro-tabla-resumen-ejecutivo-porcentaje', className="text-danger small mt-1")], width=12)], className="mb-4")]),
+            dbc.Tab(label="Gráficos", tab_id=TAB_GRAFICOS, children=[dbc.Row(id='tarjetas-kpi-graficos', className="my-4 g-4"), dbc.Row([dbc.Col(dbc.Card(dcc.Graph(id='grafico-torta-torre'), className="shadow-sm"), md=6), dbc.Col(dbc.Card(dcc.Graph(id='grafico-barras-resolutividad'), className="shadow-sm"), md=6)], className="my-4"), dbc.Row([dbc.Col(dbc.Card(dcc.Graph(id='grafico-volumen-ejecutivo'), className="shadow-sm"), md=6), dbc.Col(dbc.Card(dcc.Graph(id='grafico-composicion-status'), className="shadow-sm"), md=6)], className="my-4")]),
+            dbc.Tab(label="Ranking KPI", tab_id=TAB_RANKING, children=[
                 dbc.Row([
                     dbc.Col(html.H3("Ranking de Ejecutivos Clave", className="mt-4 mb-3 border-bottom pb-2 text-primary"), width=12, className="text-center")
                 ]),
@@ -145,186 +903,238 @@ if datos_cargados_correctamente:
                     dbc.Col(id='kpi-quantity-ranking-container', md=5) 
                 ], className="my-4", justify="center"),
                 dbc.Row([
-                    dbc.Col(dbc.Button("Descargar Ranking como XLSX", id="btn-download-ranking", color="success", outline=True, className="mt-3"), width={"size": 4, "offset": 4})
+                    dbc.Col(dbc.Button("Descargar Ranking como XLSX", id="btn-download-ranking", color="success", outline=True, className="mt-3", external_link=True), width={"size": 4, "offset": 4})
                 ], className="mb-4")
             ]),
-            dbc.Tab(label="Descargar", children=[dbc.Row([dbc.Col([html.H4("Panel de Descarga", className="mt-4 mb-3 text-dark"), html.P("Usa los filtros principales del dashboard y el selector de fechas para definir los datos a descargar.", className="text-muted"), dcc.DatePickerRange(id='download-date-picker', min_date_allowed=df_principal[COLUMNA_FECHA].min().date(), max_date_allowed=df_principal[COLUMNA_FECHA].max().date(), start_date=df_principal[COLUMNA_FECHA].min().date(), end_date=df_principal[COLUMNA_FECHA].max().date(), display_format='DD/MM/YYYY', className="dbc"), dbc.Button("Generar Archivo para Descarga", id="btn-generate-download", color="primary", className="mt-3 w-75"), html.Div(id="download-preview-container", className="mt-4"), dbc.Button("Descargar Archivo Completo (3 Hojas) como XLSX", id="btn-download-all", color="success", className="mt-3 w-75", disabled=True)], className="text-center", md={'size': 8, 'offset': 2})], className="my-4")])
-        ], className="mt-4 shadow-sm"),
-        html.Div(id='last-updated-text', children=[initial_load_time_str], style={'textAlign': 'right', 'color': 'grey', 'marginTop': '20px', 'fontSize': '0.8em'})
+            dbc.Tab(label="Descargar", tab_id=TAB_DESCARGAR, children=[dbc.Row([dbc.Col([html.H4("Panel de Descarga", className="mt-4 mb-3 text-dark"), html.P("Usa los filtros principales del dashboard y el selector de fechas para definir los datos a descargar.", className="text-muted"), dcc.DatePickerRange(id='download-date-picker', display_format='DD/MM/YYYY', className="dbc"), html.Div([html.Label("Formato de los datos detallados:", className="fw-bold me-3"), dbc.RadioItems(id='formato-descarga', options=[{'label': f['opcion'], 'value': clave} for clave, f in FORMATOS_DESCARGA.items()], value='xlsx', inline=True)], className="d-flex justify-content-center mt-3"), dbc.Button("Generar Archivo para Descarga", id="btn-generate-download", color="primary", className="mt-3 w-75"), html.Div([dbc.Progress(id='progreso-descarga', value=0, striped=True, animated=True, style={'height': '1.5rem'}, className="w-75 mx-auto"), dbc.Button("Cancelar", id="btn-cancelar-descarga", color="link", size="sm", className="mt-1")], id='contenedor-progreso-descarga', className="mt-3", style={'display': 'none'}), html.Div(id="download-preview-container", className="mt-4"), dbc.Button(FORMATOS_DESCARGA['xlsx']['boton'], id="btn-download-all", color="success", className="mt-3 w-75", disabled=True, external_link=True), dbc.Button("Descargar Resúmenes (2 Hojas) como XLSX", id="btn-download-resumenes", color="success", outline=True, className="mt-2 w-75", external_link=True, style={'display': 'none'})], className="text-center", md={'size': 8, 'offset': 2})], className="my-4")])
+        ], id='tabs-dashboard', active_tab=TAB_MENSUAL, className="mt-4 shadow-sm"),
+        html.Div(id='last-updated-text', children=[texto_ultima_carga()], style={'textAlign': 'right', 'color': 'grey', 'marginTop': '20px', 'fontSize': '0.8em'})
     ], fluid=True)
-else:
-    app.layout = dbc.Container([
-        dbc.Alert(error_mensaje, color="danger", className="mt-4")
-    ])
+
+
+app.layout = construir_layout
 
 # --- 5. LÓGICA DE INTERACTIVIDAD (CALLBACKS) ---
 
 @callback(
     Output('store-main-data', 'data'),
     Output('last-updated-text', 'children'),
+    Output('aviso-carga', 'children'),
+    Output('interval-carga', 'disabled'),
     Input('interval-component', 'n_intervals'),
+    Input('interval-carga', 'n_intervals'),
+    State('store-main-data', 'data'),
     prevent_initial_call=True
 )
-def auto_update_data(n):
+def auto_update_data(n, n_carga, version_actual):
+    estado = _estado_carga_inicial['estado']
+    if estado == 'pendiente':
+        raise PreventUpdate
+    if estado == 'error':
+        return dash.no_update, texto_ultima_carga(), aviso_carga(), True
+    # El hilo de sondeo es el que recarga y el callback nunca lo espera: con el lock libre lee la
+    # versión y su hora juntas; si hay una recarga en curso sigue con la versión ya publicada
+    iniciar_carga_inicial()
+    lock_tomado = _refresco_lock.acquire(blocking=False)
+    try:
+        nueva_version, hora_carga = _cache_version_actual, _estado_refresco['hora_carga']
+    finally:
+        if lock_tomado:
+            _refresco_lock.release()
     try:
-        new_df = cargar_datos_desde_db()
-        new_data_json = new_df.to_json(date_format='iso', orient='split')
-        update_time_str = f"Datos actualizados desde DB: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-        return new_data_json, update_time_str
+        if nueva_version == version_actual:
+            raise PreventUpdate
+        if version_actual is None or hora_carga is None:
+            update_time_str = texto_ultima_carga()
+        else:
+            update_time_str = f"Datos actualizados desde DB: {hora_carga.strftime('%d/%m/%Y %H:%M:%S')}"
+        return nueva_version, update_time_str, aviso_carga(), True
+    except PreventUpdate:
+        raise
     except Exception as e:
         print(f"Error durante la actualización automática de datos: {e}")
         traceback.print_exc()
         raise PreventUpdate
 
+
+@callback(
+    Output('filtro-mes', 'options'),
+    Output('filtro-semana', 'options'),
+    Output('filtro-torre', 'options'),
+    Output('filtro-ejecutivo', 'options'),
+    Output('download-date-picker', 'min_date_allowed'),
+    Output('download-date-picker', 'max_date_allowed'),
+    Output('download-date-picker', 'start_date'),
+    Output('download-date-picker', 'end_date'),
+    Input('store-main-data', 'data'),
+    State('download-date-picker', 'start_date'),
+    State('download-date-picker', 'end_date')
+)
+def actualizar_opciones_filtros(version_datos, fecha_inicio, fecha_fin):
+    """Opciones de los filtros y rango del selector de fechas de la versión de datos mostrada."""
+    if not version_datos:
+        raise PreventUpdate
+    opciones = obtener_opciones(version_datos)
+    if opciones is None:
+        raise PreventUpdate
+    return (
+        opciones['meses'], opciones['semanas'], opciones['torres'], opciones['ejecutivos'],
+        opciones['fecha_min'], opciones['fecha_max'],
+        fecha_inicio or opciones['fecha_min'], fecha_fin or opciones['fecha_max']
+    )
+
 @callback(Output('contenedor-filtro-quincena', 'style'), Output('contenedor-filtro-semana', 'style'), Input('modo-filtro-tiempo', 'value'))
 def controlar_visibilidad_filtros(modo):
     if modo == 'quincena': return {'display': 'block'}, {'display': 'none'}
     else: return {'display': 'none'}, {'display': 'block'}
 
-def crear_tabla_conteo_diario(df, index_col, date_range=None):
-    if df.empty: return pd.DataFrame(), [], []
-    df['Fecha_Dia'] = df[COLUMNA_FECHA].dt.date
-    total_general_col = df.groupby(index_col)[COLUMNA_ORDEN].count().to_frame('Total General')
-    pivot_dia = pd.pivot_table(df, values=COLUMNA_ORDEN, index=index_col, columns='Fecha_Dia', aggfunc='count', fill_value=0)
+# --- TABLAS DIARIAS ---
+# Las tablas de conteo y de porcentaje de corregidos salen de un único cruce (fila, día, corregido)
+# del cubo; los porcentajes se envían como números y la DataTable les da formato con FormatTemplate.
+FORMATO_PORCENTAJE = FormatTemplate.percentage(0)
+
+
+def calcular_cruce_diario(cubo, index_col):
+    """Cantidades totales y corregidas por (index_col, día) con una sola pasada sobre el cubo.
+
+    Devuelve dos DataFrames con los valores de index_col ordenados como filas y los días como columnas.
+    """
+    filas, etiquetas = pd.factorize(cubo[index_col], sort=True)
+    dias, fechas = pd.factorize(cubo['Fecha_Dia'], sort=True)
+    cantidad = cubo['Cantidad'].to_numpy()
+    corregido = cubo[COLUMNA_STATUS].eq('Corregido').to_numpy()
+    # Cada (fila, día, corregido) es una celda de un arreglo plano que se acumula con bincount
+    celda = (filas * len(fechas) + dias) * 2 + corregido
+    conteos = np.bincount(celda, weights=cantidad, minlength=len(etiquetas) * len(fechas) * 2)
+    conteos = conteos.astype(np.int64).reshape(len(etiquetas), len(fechas), 2)
+    indice = pd.Index(etiquetas, name=index_col)
+    columnas = pd.DatetimeIndex(fechas, name='Fecha_Dia')
+    totales = pd.DataFrame(conteos.sum(axis=2), index=indice, columns=columnas)
+    corregidos = pd.DataFrame(conteos[:, :, 1], index=indice, columns=columnas)
+    return totales, corregidos
+
+
+def _columnas_tabla_diaria(index_col, fechas, formato_dia=None):
+    """Nombres de columna (los días como dd-mm-YYYY, en el orden del índice de fechas) y sus specs."""
+    dia_cols = list(fechas.strftime('%d-%m-%Y'))
+    spec_dia = {'type': 'numeric', 'format': formato_dia} if formato_dia else {}
+    specs = [{'name': index_col, 'id': index_col}] + [{'name': c, 'id': c, **spec_dia} for c in dia_cols] + [{'name': 'Total General', 'id': 'Total General'}]
+    return [index_col] + dia_cols + ['Total General'], specs
+
+
+def crear_tabla_conteo_diario(cubo, index_col, date_range=None, cruce=None):
+    if cubo.empty: return pd.DataFrame(), [], []
+    totales, _ = cruce if cruce is not None else calcular_cruce_diario(cubo, index_col)
+    total_general = totales.sum(axis=1)
     if date_range is not None:
-        pivot_dia.columns = pd.to_datetime(pivot_dia.columns)
-        pivot_dia = pivot_dia.reindex(columns=date_range, fill_value=0)
-    resumen_df = total_general_col.join(pivot_dia).fillna(0).astype(int)
-    resumen_df.sort_values(by='Total General', ascending=False, inplace=True)
-    resumen_df.reset_index(inplace=True)
-    if not resumen_df.empty:
-        total_row = {index_col: 'Total General'}
-        numeric_cols = resumen_df.select_dtypes(include='number').columns
-        total_row.update(resumen_df[numeric_cols].sum().to_dict())
-        total_row_df = pd.DataFrame([total_row])
-        resumen_df = pd.concat([resumen_df, total_row_df], ignore_index=True)
-    resumen_df.columns = [col.strftime('%d-%m-%Y') if hasattr(col, 'strftime') else col for col in resumen_df.columns]
-    dia_cols = sorted([c for c in resumen_df.columns if c not in [index_col, 'Total General']], key=lambda x: pd.to_datetime(x, format='%d-%m-%Y'))
-    column_order = [index_col] + dia_cols + ['Total General']
-    resumen_df = resumen_df[column_order]
-    return resumen_df, resumen_df.to_dict('records'), [{'name': c, 'id': c} for c in column_order]
-
-def crear_tabla_porcentaje_corregido(df, index_col, date_range=None):
-    if df.empty: return pd.DataFrame(), [], []
-    df['Fecha_Dia'] = df[COLUMNA_FECHA].dt.date
-    pivot_total = pd.pivot_table(df, values=COLUMNA_ORDEN, index=index_col, columns='Fecha_Dia', aggfunc='count', fill_value=0)
-    pivot_corregido = pd.pivot_table(df[df[COLUMNA_STATUS] == 'Corregido'], values=COLUMNA_ORDEN, index=index_col, columns='Fecha_Dia', aggfunc='count', fill_value=0)
+        totales = totales.reindex(columns=date_range, fill_value=0)
+    column_order, specs = _columnas_tabla_diaria(index_col, totales.columns)
+    resumen_df = totales.set_axis(column_order[1:-1], axis=1)
+    resumen_df['Total General'] = total_general
+    resumen_df = resumen_df.sort_values(by='Total General', ascending=False).reset_index()
+    total_row = resumen_df[column_order[1:]].sum()
+    total_row[index_col] = 'Total General'
+    resumen_df.loc[len(resumen_df)] = total_row
+    return resumen_df, resumen_df.to_dict('records'), specs
+
+def crear_tabla_porcentaje_corregido(cubo, index_col, date_range=None, cruce=None):
+    """Tabla de porcentaje de corregidos por día; los valores son fracciones (0 a 1) sin formatear."""
+    if cubo.empty: return pd.DataFrame(), [], []
+    totales, corregidos = cruce if cruce is not None else calcular_cruce_diario(cubo, index_col)
+    total_general = totales.sum(axis=1)
     if date_range is not None:
-        pivot_total.columns = pd.to_datetime(pivot_total.columns)
-        pivot_corregido.columns = pd.to_datetime(pivot_corregido.columns)
-        pivot_total = pivot_total.reindex(columns=date_range, fill_value=0)
-        pivot_corregido = pivot_corregido.reindex(columns=date_range, fill_value=0)
-    pivot_porcentaje = (pivot_corregido / pivot_total).fillna(0)
-    total_general_counts = df.groupby(index_col)[COLUMNA_ORDEN].count()
-    resumen_df = pivot_porcentaje
-    resumen_df['Total General'] = total_general_counts
-    resumen_df.fillna(0, inplace=True)
-    resumen_df.sort_values(by='Total General', ascending=False, inplace=True)
-    for col in [c for c in resumen_df.columns if c != 'Total General']:
-        resumen_df[col] = resumen_df[col].apply(lambda x: f"{x:.0%}")
-    resumen_df['Total General'] = resumen_df['Total General'].astype(int)
-    resumen_df.reset_index(inplace=True)
-    resumen_df.columns = [col.strftime('%d-%m-%Y') if hasattr(col, 'strftime') else col for col in resumen_df.columns]
-    dia_cols = sorted([c for c in resumen_df.columns if c not in [index_col, 'Total General']], key=lambda x: pd.to_datetime(x, format='%d-%m-%Y'))
-    column_order = [index_col] + dia_cols + ['Total General']
-    resumen_df = resumen_df[column_order]
-    return resumen_df, resumen_df.to_dict('records'), [{'name': c, 'id': c} for c in column_order]
+        totales = totales.reindex(columns=date_range, fill_value=0)
+        corregidos = corregidos.reindex(columns=date_range, fill_value=0)
+    total_dia = totales.to_numpy(dtype=float)
+    porcentajes = np.divide(corregidos.to_numpy(dtype=float), total_dia, out=np.zeros_like(total_dia), where=total_dia > 0)
+    column_order, specs = _columnas_tabla_diaria(index_col, totales.columns, FORMATO_PORCENTAJE)
+    resumen_df = pd.DataFrame(porcentajes, index=totales.index, columns=column_order[1:-1])
+    resumen_df['Total General'] = total_general
+    resumen_df = resumen_df.sort_values(by='Total General', ascending=False).reset_index()
+    # escribir_xlsx_temporal usa esta marca para exportar los días con formato de porcentaje
+    resumen_df.attrs['columnas_porcentaje'] = column_order[1:-1]
+    return resumen_df, resumen_df.to_dict('records'), specs
 
-@callback(
-    Output('tabla-resumen-mensual', 'data'), Output('tabla-resumen-mensual', 'columns'),
-    Output('tabla-resumen-torre', 'data'), Output('tabla-resumen-torre', 'columns'),
-    Output('tabla-resumen-status', 'data'), Output('tabla-resumen-status', 'columns'),
-    Output('tabla-resumen-ejecutivo-conteo', 'data'), Output('tabla-resumen-ejecutivo-conteo', 'columns'),
-    Output('tabla-resumen-ejecutivo-porcentaje', 'data'), Output('tabla-resumen-ejecutivo-porcentaje', 'columns'),
-    Output('tarjetas-kpi-mensual', 'children'),
-    Output('tarjetas-kpi-diario', 'children'),
-    Output('tarjetas-kpi-graficos', 'children'),
-    Output('grafico-torta-torre', 'figure'),
-    Output('grafico-barras-resolutividad', 'figure'),
-    Output('grafico-volumen-ejecutivo', 'figure'),
-    Output('grafico-composicion-status', 'figure'),
-    Output('kpi-ranking-container', 'children'),
-    Output('kpi-quantity-ranking-container', 'children'),
-    Output('store-kpi-resolutividad-data', 'data'),
-    Output('store-kpi-cantidad-data', 'data'),
-    Output('store-filtered-data', 'data'),
-    Input('store-main-data', 'data'),
-    Input('filtro-mes', 'value'), 
-    Input('filtro-quincena', 'value'), 
-    Input('filtro-semana', 'value'),
-    Input('filtro-torre', 'value'), 
-    Input('filtro-ejecutivo', 'value'),
-    State('modo-filtro-tiempo', 'value')
-)
-def actualizar_dashboard_completo(json_data, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
-    if not json_data:
-        raise PreventUpdate
-        
-    df_principal = pd.read_json(io.StringIO(json_data), orient='split')
-    df_principal[COLUMNA_FECHA] = pd.to_datetime(df_principal[COLUMNA_FECHA])
-    dff = df_principal.copy()
-    
-    if meses: dff = dff[dff['Mes'].isin(meses)]
-    if modo_tiempo == 'quincena' and quincena:
-        dff = dff[dff[COLUMNA_FECHA].dt.day <= 15 if quincena == 1 else dff[COLUMNA_FECHA].dt.day > 15]
-    elif modo_tiempo == 'semana' and semanas:
-        dff = dff[dff['Semana_Num'].isin(semanas)]
-    if torres: dff = dff[dff[COLUMNA_TORRE].isin(torres)]
-    if ejecutivos: dff = dff[dff[COLUMNA_ANALISTA].isin(ejecutivos)]
+# --- FÁBRICA DE GRÁFICOS ---
+# Los gráficos se arman como dicts de Plotly directamente desde los arreglos agregados, sin
+# plotly.express ni la validación de go.Figure; la plantilla se resuelve una sola vez al iniciar.
+PLANTILLA_GRAFICOS = pio.templates['plotly_white'].to_plotly_json()
+COLORES_GRAFICOS = PLANTILLA_GRAFICOS['layout']['colorway']
 
-    # Bloque `if dff.empty:` CORREGIDO
-    if dff.empty:
-        empty_df_dict = [{'Nota': 'No hay datos para los filtros seleccionados'}]
-        empty_cols = [{'name': 'Nota', 'id': 'Nota'}]
-        no_data_msg = [dbc.Col(dbc.Alert("No hay datos para mostrar con los filtros seleccionados.", color="warning"), width=12)]
-        empty_fig = {'layout': {'xaxis': {'visible': False}, 'yaxis': {'visible': False}, 'annotations': [{'text': 'No data', 'showarrow': False}]}}
-        empty_data = pd.DataFrame().to_json(orient='split') # Define empty_data aquí
-        return (empty_df_dict, empty_cols, empty_df_dict, empty_cols, empty_df_dict, empty_cols,
-                empty_df_dict, empty_cols, empty_df_dict, empty_cols, 
-                no_data_msg, no_data_msg, no_data_msg,
-                empty_fig, empty_fig, empty_fig, empty_fig, 
-                no_data_msg, no_data_msg, 
-                empty_data, empty_data, empty_data) # Devuelve empty_data para los 3 stores
-
-    all_months_ordered_local = sorted(df_principal['Mes'].unique(), key=lambda m: pd.to_datetime(f'01-{m}-2025', format='%d-%B-%Y').month)
-    
-    pivot_mensual = pd.pivot_table(dff, values=COLUMNA_ORDEN, index=[COLUMNA_TORRE, COLUMNA_ANALISTA], columns='Mes', aggfunc='count', fill_value=0)
-    pivot_mensual['Total General'] = pivot_mensual.sum(axis=1)
-    active_months = dff['Mes'].unique()
-    month_order_map = {month: i for i, month in enumerate(all_months_ordered_local)}
-    sorted_active_months = sorted(active_months, key=lambda m: month_order_map.get(m, 99))
-    if 'Total General' in pivot_mensual.columns: pivot_mensual = pivot_mensual[sorted_active_months + ['Total General']]
-    records = []
-    torre_totals = dff.groupby(COLUMNA_TORRE)[COLUMNA_ORDEN].count().sort_values(ascending=False)
-    for torre in torre_totals.index:
-        df_torre_pivot = pivot_mensual.loc[torre]
-        torre_sum = df_torre_pivot.sum()
-        torre_row = {'Etiquetas de Fila': torre, 'Tipo': 'Torre'}; torre_row.update(torre_sum); records.append(torre_row)
-        if isinstance(df_torre_pivot, pd.Series):
-            ejec_row = {'Etiquetas de Fila': f'     {df_torre_pivot.name}', 'Tipo': 'Ejecutivo'}; ejec_row.update(df_torre_pivot); records.append(ejec_row)
-        else:
-            for ejecutivo_name, data in df_torre_pivot.iterrows():
-                ejec_row = {'Etiquetas de Fila': f'     {ejecutivo_name}', 'Tipo': 'Ejecutivo'}; ejec_row.update(data); records.append(ejec_row)
-    df_mensual_final = pd.DataFrame(records)
-    cols_mensual = [{'name': c, 'id': c} for c in df_mensual_final.columns if c != 'Tipo']
-    data_mensual = df_mensual_final.to_dict('records')
 
-    date_range_for_tables = None
-    if modo_tiempo == 'semana' and semanas:
-        min_date = dff[dff['Semana_Num'].isin(semanas)]['WeekStartDate'].min()
-        max_date = dff[dff['Semana_Num'].isin(semanas)]['WeekEndDate'].max()
-        date_range_for_tables = pd.date_range(start=min_date, end=max_date)
+def _layout_grafico(titulo, **extra):
+    return {'template': PLANTILLA_GRAFICOS, 'title': {'text': titulo, 'x': 0.5}, 'font': {'size': 10}, **extra}
+
+
+def figura_torta(etiquetas, valores, titulo, nombre_etiqueta, nombre_valor):
+    """Gráfico de dona con porcentaje y etiqueta dentro de cada porción."""
+    return {
+        'data': [{
+            'type': 'pie', 'labels': etiquetas, 'values': valores, 'hole': .4,
+            'textposition': 'inside', 'textinfo': 'percent+label', 'hoverinfo': 'label+percent+value',
+            'hovertemplate': f"{nombre_etiqueta}=%{{label}}<br>{nombre_valor}=%{{value}}<extra></extra>",
+            'marker': {'line': {'color': '#000000', 'width': 1}},
+        }],
+        'layout': _layout_grafico(titulo, showlegend=False),
+    }
+
+
+def figura_barras_porcentaje(categorias, porcentajes, titulo, nombre_categoria, nombre_valor, color):
+    """Barras horizontales con el porcentaje (0 a 100) rotulado fuera de cada barra."""
+    return {
+        'data': [{
+            'type': 'bar', 'orientation': 'h', 'x': porcentajes, 'y': categorias,
+            'texttemplate': '%{x:.0f}%', 'textposition': 'outside', 'marker': {'color': color},
+            'hovertemplate': f"{nombre_valor}=%{{x}}<br>{nombre_categoria}=%{{y}}<extra></extra>",
+        }],
+        'layout': _layout_grafico(titulo, xaxis={'title': {'text': 'Porcentaje (%)'}}, yaxis={'categoryorder': 'total ascending'}),
+    }
 
-    _, data_torre, cols_torre = crear_tabla_conteo_diario(dff, COLUMNA_TORRE, date_range_for_tables)
-    _, data_status, cols_status = crear_tabla_conteo_diario(dff, COLUMNA_STATUS, date_range_for_tables)
-    _, data_ejecutivo_conteo, cols_ejecutivo_conteo = crear_tabla_conteo_diario(dff, COLUMNA_ANALISTA, date_range_for_tables)
-    _, data_ejecutivo_porcentaje, cols_ejecutivo_porcentaje = crear_tabla_porcentaje_corregido(dff, COLUMNA_ANALISTA, date_range_for_tables)
 
-    dias_trabajados = dff[COLUMNA_FECHA].dt.normalize().nunique()
-    gestion_totales = dff[COLUMNA_ORDEN].count()
-    total_ejecutivos = dff[COLUMNA_ANALISTA].nunique()
+def figura_barras_apiladas(df, columna_x, columna_y, columna_color, orden_x, titulo, titulo_y):
+    """Barras apiladas con una traza por valor de columna_color, en el orden en que aparecen en df."""
+    trazas = []
+    for i, (grupo, df_grupo) in enumerate(df.groupby(columna_color, sort=False, observed=True)):
+        trazas.append({
+            'type': 'bar', 'name': grupo, 'x': df_grupo[columna_x].to_numpy(), 'y': df_grupo[columna_y].to_numpy(),
+            'texttemplate': '%{y}', 'marker': {'color': COLORES_GRAFICOS[i % len(COLORES_GRAFICOS)]},
+            'hovertemplate': f"{columna_color}={grupo}<br>{columna_x}=%{{x}}<br>{columna_y}=%{{y}}<extra></extra>",
+        })
+    return {
+        'data': trazas,
+        'layout': _layout_grafico(titulo, barmode='stack', legend={'title': {'text': columna_color}},
+                                  xaxis={'categoryorder': 'array', 'categoryarray': list(orden_x)},
+                                  yaxis={'title': {'text': titulo_y}}),
+    }
+
+
+# --- CÁLCULO POR PESTAÑA ---
+# Cada pestaña calcula solo sus propias salidas cuando está visible; las demás se calculan
+# la primera vez que se abren y se reutilizan mientras no cambien los filtros ni los datos.
+EMPTY_DF_DICT = [{'Nota': 'No hay datos para los filtros seleccionados'}]
+EMPTY_COLS = [{'name': 'Nota', 'id': 'Nota'}]
+NO_DATA_MSG = [dbc.Col(dbc.Alert("No hay datos para mostrar con los filtros seleccionados.", color="warning"), width=12)]
+NO_RANKING_MSG = dbc.Alert("No hay datos para generar el ranking KPI con los ejecutivos y filtros seleccionados.", color="info")
+EMPTY_FIG = {'layout': {'xaxis': {'visible': False}, 'yaxis': {'visible': False}, 'annotations': [{'text': 'No data', 'showarrow': False}]}}
+
+
+def crear_tarjeta_kpi(titulo, valor, color_valor="primary", icon="bi bi-info-circle"):
+    return dbc.Col(dbc.Card(dbc.CardBody([
+        html.Div([
+            html.H6(titulo, className="card-title text-muted me-2"),
+            html.I(className=icon, style={"fontSize": "1.2em", "color": "grey"})
+        ], className="d-flex align-items-center"),
+        html.H3(valor, className=f"card-text text-{color_valor} fw-bold") 
+    ]), className="shadow-sm text-center border-0 rounded-lg"))
+
+
+
+def calcular_tarjetas(cubo_f):
+    dias_trabajados = cubo_f['Fecha_Dia'].nunique()
+    gestion_totales = cubo_f['Cantidad'].sum()
+    total_ejecutivos = cubo_f[COLUMNA_ANALISTA].nunique()
     
-    total_capacidad = dff[dff[COLUMNA_STATUS] == 'Capacidad'][COLUMNA_ORDEN].count()
+    total_capacidad = cubo_f.loc[cubo_f[COLUMNA_STATUS] == 'Capacidad', 'Cantidad'].sum()
     gestiones_atendidas_raw = (gestion_totales - total_capacidad) / gestion_totales if gestion_totales > 0 else 0
     gestiones_atendidas = f"{gestiones_atendidas_raw:.2%}"
 
@@ -332,19 +1142,10 @@ def actualizar_dashboard_completo(json_data, meses, quincena, semanas, torres, e
     if dias_trabajados > 0 and total_ejecutivos > 0:
         gestion_fte_dia = int(((gestion_totales - total_capacidad) / dias_trabajados) / total_ejecutivos)
     
-    total_corregido = dff[dff[COLUMNA_STATUS] == 'Corregido'][COLUMNA_ORDEN].count()
+    total_corregido = cubo_f.loc[cubo_f[COLUMNA_STATUS] == 'Corregido', 'Cantidad'].sum()
     tasa_resolutividad_raw = (total_corregido / gestion_totales) if gestion_totales > 0 else 0
     tasa_resolutividad = f"{tasa_resolutividad_raw:.2%}"
 
-    def crear_tarjeta_kpi(titulo, valor, color_valor="primary", icon="bi bi-info-circle"):
-        return dbc.Col(dbc.Card(dbc.CardBody([
-            html.Div([
-                html.H6(titulo, className="card-title text-muted me-2"),
-                html.I(className=icon, style={"fontSize": "1.2em", "color": "grey"})
-            ], className="d-flex align-items-center"),
-            html.H3(valor, className=f"card-text text-{color_valor} fw-bold") 
-        ]), className="shadow-sm text-center border-0 rounded-lg"))
-    
     tarjetas = [
         crear_tarjeta_kpi("Gestiones Totales", f"{gestion_totales}", "primary", "bi bi-clipboard-data"), 
         crear_tarjeta_kpi("Total Ejecutivos", f"{total_ejecutivos}", "dark", "bi bi-people"), 
@@ -353,39 +1154,146 @@ def actualizar_dashboard_completo(json_data, meses, quincena, semanas, torres, e
         crear_tarjeta_kpi("Gestión FTE Día", f"{gestion_fte_dia}", "secondary", "bi bi-person-workspace")
     ]
     
-    df_torre_chart = dff.groupby(COLUMNA_TORRE)[COLUMNA_ORDEN].count().reset_index()
-    fig_torta_torre = px.pie(df_torre_chart, names=COLUMNA_TORRE, values=COLUMNA_ORDEN, title='Distribución de Gestiones por Torre', hole=.4, template='plotly_white')
-    fig_torta_torre.update_traces(textposition='inside', textinfo='percent+label', hoverinfo='label+percent+value', marker=dict(line=dict(color='#000000', width=1)))
-    fig_torta_torre.update_layout(showlegend=False, title_x=0.5, font=dict(size=10))
-
-    df_ejec_total = dff.groupby(COLUMNA_ANALISTA)[COLUMNA_ORDEN].count()
-    df_ejec_corr = dff[dff[COLUMNA_STATUS]=='Corregido'].groupby(COLUMNA_ANALISTA)[COLUMNA_ORDEN].count()
-    df_resolutividad = ((df_ejec_corr / df_ejec_total).fillna(0) * 100).reset_index(name='Tasa de Resolutividad').sort_values('Tasa de Resolutividad', ascending=False)
-    fig_bar_resolutividad = px.bar(df_resolutividad, x='Tasa de Resolutividad', y=COLUMNA_ANALISTA, title='Tasa de Resolutividad por Ejecutivo', text_auto='.0f', orientation='h', template='plotly_white')
-    fig_bar_resolutividad.update_traces(texttemplate='%{x:.0f}%', textposition='outside', marker_color='#28a745')
-    fig_bar_resolutividad.update_layout(yaxis={'categoryorder':'total ascending'}, xaxis_title='Porcentaje (%)', yaxis_title=None, title_x=0.5, font=dict(size=10))
-    
-    df_volumen_ejec = dff.groupby(COLUMNA_ANALISTA)[COLUMNA_ORDEN].count().reset_index(name='Cantidad')
-    fig_volumen_ejec = px.pie(df_volumen_ejec, names=COLUMNA_ANALISTA, values='Cantidad', title='Distribución de Gestiones por Ejecutivo', hole=.4, template='plotly_white')
-    fig_volumen_ejec.update_traces(textposition='inside', textinfo='percent+label', hoverinfo='label+percent+value', marker=dict(line=dict(color='#000000', width=1)))
-    fig_volumen_ejec.update_layout(showlegend=False, title_x=0.5, font=dict(size=10))
-
-    df_status_exec_chart = dff.groupby([COLUMNA_ANALISTA, COLUMNA_STATUS])[COLUMNA_ORDEN].count().reset_index(name='Cantidad')
-    total_volume_order = dff.groupby(COLUMNA_ANALISTA)[COLUMNA_ORDEN].count().sort_values(ascending=False).index
-    fig_composicion_status = px.bar(df_status_exec_chart, x=COLUMNA_ANALISTA, y='Cantidad', color=COLUMNA_STATUS, title='Composición de Status por Ejecutivo (Cantidad)', template='plotly_white', text_auto=True)
-    fig_composicion_status.update_layout(barmode='stack', xaxis_title=None, yaxis_title='Cantidad de Gestiones', title_x=0.5, xaxis={'categoryorder':'array', 'categoryarray': total_volume_order}, font=dict(size=10))
-    
-    df_kpi = dff[dff[COLUMNA_ANALISTA].isin(EJECUTIVOS_KPI_RANKING)]
-    if not df_kpi.empty:
-        total_ordenes_kpi = df_kpi.groupby(COLUMNA_ANALISTA)[COLUMNA_ORDEN].count()
-        ordenes_corregidas_kpi = df_kpi[df_kpi[COLUMNA_STATUS] == 'Corregido'].groupby(COLUMNA_ANALISTA)[COLUMNA_ORDEN].count()
-        
-        kpi_ranking = (ordenes_corregidas_kpi / total_ordenes_kpi).fillna(0).sort_values(ascending=False)
-        df_kpi_resolutividad = kpi_ranking.reset_index()
-        df_kpi_resolutividad.columns = ['Ejecutivo', 'Resolutividad']
-        
+    return tarjetas
+
+
+def calcular_tab_mensual(version_datos, cubo_f, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    """Tabla jerárquica mensual: una fila de subtotal por torre seguida de sus ejecutivos.
+
+    Las torres van de mayor a menor cantidad y los ejecutivos de cada torre en orden alfabético.
+    """
+    sorted_active_months = sorted(cubo_f['Mes'].unique(), key=lambda m: MESES_POR_NOMBRE.get(m, 99))
+    filas_ejecutivo = cubo_f.groupby([COLUMNA_TORRE, COLUMNA_ANALISTA, 'Mes'])['Cantidad'].sum().unstack('Mes', fill_value=0)[sorted_active_months]
+    filas_ejecutivo['Total General'] = filas_ejecutivo.sum(axis=1)
+    filas_torre = filas_ejecutivo.groupby(level=COLUMNA_TORRE).sum()
+
+    torre_totals = cubo_f.groupby(COLUMNA_TORRE)['Cantidad'].sum().sort_values(ascending=False)
+    orden_torre = pd.Series(np.arange(len(torre_totals)), index=torre_totals.index)
+    filas_torre = filas_torre.reset_index().rename(columns={COLUMNA_TORRE: 'Etiquetas de Fila'})
+    filas_torre.insert(1, 'Tipo', 'Torre')
+    filas_torre['_orden'] = filas_torre['Etiquetas de Fila'].map(orden_torre)
+    filas_ejecutivo = filas_ejecutivo.reset_index()
+    filas_ejecutivo['_orden'] = filas_ejecutivo[COLUMNA_TORRE].map(orden_torre)
+    filas_ejecutivo = filas_ejecutivo.drop(columns=COLUMNA_TORRE).rename(columns={COLUMNA_ANALISTA: 'Etiquetas de Fila'})
+    filas_ejecutivo['Etiquetas de Fila'] = '     ' + filas_ejecutivo['Etiquetas de Fila'].astype(str)
+    filas_ejecutivo.insert(1, 'Tipo', 'Ejecutivo')
+
+    # El orden estable deja cada torre antes de sus ejecutivos, que ya vienen ordenados del groupby
+    df_mensual_final = pd.concat([filas_torre, filas_ejecutivo], ignore_index=True).sort_values('_orden', kind='stable').drop(columns='_orden')
+    df_mensual_final.columns.name = None
+    cols_mensual = [{'name': c, 'id': c} for c in df_mensual_final.columns if c != 'Tipo']
+    data_mensual = df_mensual_final.to_dict('records')
+
+    return data_mensual, cols_mensual
+
+
+def calcular_tablas_diarias(cubo_f, semanas, modo_tiempo):
+    """Frames y columnas de las cuatro tablas diarias, como {id_tabla: (frame, columnas)}."""
+    if cubo_f.empty:
+        return {id_tabla: (pd.DataFrame(EMPTY_DF_DICT), EMPTY_COLS) for id_tabla in TABLAS_DIARIAS}
+    date_range_for_tables = None
+    if modo_tiempo == 'semana' and semanas:
+        dias_semanas = cubo_f.loc[cubo_f['Semana_Num'].isin(semanas), 'Fecha_Dia']
+        min_date = dias_semanas.min() - pd.Timedelta(days=dias_semanas.min().dayofweek)
+        max_date = dias_semanas.max() + pd.Timedelta(days=6 - dias_semanas.max().dayofweek)
+        date_range_for_tables = pd.date_range(start=min_date, end=max_date)
+
+    df_torre, _, cols_torre = crear_tabla_conteo_diario(cubo_f, COLUMNA_TORRE, date_range_for_tables)
+    df_status, _, cols_status = crear_tabla_conteo_diario(cubo_f, COLUMNA_STATUS, date_range_for_tables)
+    cruce_ejecutivo = calcular_cruce_diario(cubo_f, COLUMNA_ANALISTA)
+    df_ejecutivo_conteo, _, cols_ejecutivo_conteo = crear_tabla_conteo_diario(cubo_f, COLUMNA_ANALISTA, date_range_for_tables, cruce_ejecutivo)
+    df_ejecutivo_porcentaje, _, cols_ejecutivo_porcentaje = crear_tabla_porcentaje_corregido(cubo_f, COLUMNA_ANALISTA, date_range_for_tables, cruce_ejecutivo)
+    return dict(zip(TABLAS_DIARIAS, [
+        (df_torre, cols_torre), (df_status, cols_status),
+        (df_ejecutivo_conteo, cols_ejecutivo_conteo), (df_ejecutivo_porcentaje, cols_ejecutivo_porcentaje),
+    ]))
+
+
+def _clave_tablas_diarias(clave_tab):
+    return (clave_tab[0], 'tablas-diarias') + tuple(clave_tab[2:])
+
+
+def _guardar_tablas_diarias(clave_tab, tablas):
+    # Los frames no se serializan; su tamaño en la caché es el que ocupan en memoria
+    tamano = sum(int(df.memory_usage(deep=True).sum()) for df, _ in tablas.values())
+    guardar_resultado(_clave_tablas_diarias(clave_tab), tablas, tamano)
+
+
+def _a_tupla(valor):
+    """Deshace el json.dumps de una clave: las listas vuelven a ser tuplas, como en normalizar_filtros."""
+    return tuple(_a_tupla(v) for v in valor) if isinstance(valor, list) else valor
+
+
+def filtros_desde_clave(clave_tab):
+    """Reconstruye los argumentos de filtro a partir de la clave normalizada de una pestaña."""
+    meses, filtro_tiempo, torres, ejecutivos = clave_tab[2:]
+    modo_tiempo, valor = filtro_tiempo or ('quincena', None)
+    return (list(meses), valor if modo_tiempo == 'quincena' else None, list(valor) if modo_tiempo == 'semana' else None,
+            list(torres), list(ejecutivos), modo_tiempo)
+
+
+def obtener_tablas_diarias(clave_tab):
+    """Frames de las tablas diarias para la clave mostrada; se recalculan si salieron de la caché."""
+    tablas = leer_resultado(_clave_tablas_diarias(clave_tab))
+    if tablas is None:
+        filtros = filtros_desde_clave(clave_tab)
+        tablas = calcular_tablas_diarias(obtener_cubo_filtrado(clave_tab[0], *filtros), filtros[2], filtros[5])
+        _guardar_tablas_diarias(clave_tab, tablas)
+    return tablas
+
+
+def calcular_tab_diario(version_datos, cubo_f, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    """Columnas de las cuatro tablas; las filas las envía paginar_tablas_diarias página a página."""
+    tablas = calcular_tablas_diarias(cubo_f, semanas, modo_tiempo)
+    _guardar_tablas_diarias((version_datos, TAB_DIARIO) + normalizar_filtros(meses, quincena, semanas, torres, ejecutivos, modo_tiempo), tablas)
+    return tuple(columnas for _, columnas in tablas.values())
+
+
+def calcular_tab_graficos(version_datos, cubo_f, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    df_torre_chart = cubo_f.groupby(COLUMNA_TORRE)['Cantidad'].sum()
+    fig_torta_torre = figura_torta(df_torre_chart.index.to_numpy(), df_torre_chart.to_numpy(), 'Distribución de Gestiones por Torre', COLUMNA_TORRE, COLUMNA_ORDEN)
+
+    df_ejec_total = cubo_f.groupby(COLUMNA_ANALISTA)['Cantidad'].sum()
+    df_ejec_corr = cubo_f[cubo_f[COLUMNA_STATUS]=='Corregido'].groupby(COLUMNA_ANALISTA)['Cantidad'].sum()
+    df_resolutividad = ((df_ejec_corr / df_ejec_total).fillna(0) * 100).sort_values(ascending=False)
+    fig_bar_resolutividad = figura_barras_porcentaje(df_resolutividad.index.to_numpy(), df_resolutividad.to_numpy(), 'Tasa de Resolutividad por Ejecutivo', COLUMNA_ANALISTA, 'Tasa de Resolutividad', '#28a745')
+
+    fig_volumen_ejec = figura_torta(df_ejec_total.index.to_numpy(), df_ejec_total.to_numpy(), 'Distribución de Gestiones por Ejecutivo', COLUMNA_ANALISTA, 'Cantidad')
+
+    df_status_exec_chart = cubo_f.groupby([COLUMNA_ANALISTA, COLUMNA_STATUS])['Cantidad'].sum().reset_index(name='Cantidad')
+    total_volume_order = df_ejec_total.sort_values(ascending=False).index
+    fig_composicion_status = figura_barras_apiladas(df_status_exec_chart, COLUMNA_ANALISTA, 'Cantidad', COLUMNA_STATUS, total_volume_order, 'Composición de Status por Ejecutivo (Cantidad)', 'Cantidad de Gestiones')
+
+    return fig_torta_torre, fig_bar_resolutividad, fig_volumen_ejec, fig_composicion_status
+
+
+def calcular_tablas_ranking(cubo_f):
+    """Resolutividad (ordenada) y cantidades de los ejecutivos del ranking KPI; vacías si no hay datos."""
+    if cubo_f.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    df_kpi = cubo_f[cubo_f[COLUMNA_ANALISTA].isin(EJECUTIVOS_KPI_RANKING)]
+    if df_kpi.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    total_ordenes_kpi = df_kpi.groupby(COLUMNA_ANALISTA)['Cantidad'].sum()
+    ordenes_corregidas_kpi = df_kpi[df_kpi[COLUMNA_STATUS] == 'Corregido'].groupby(COLUMNA_ANALISTA)['Cantidad'].sum()
+
+    kpi_ranking = (ordenes_corregidas_kpi / total_ordenes_kpi).fillna(0).sort_values(ascending=False)
+    df_kpi_resolutividad = kpi_ranking.reset_index()
+    df_kpi_resolutividad.columns = ['Ejecutivo', 'Resolutividad']
+
+    df_kpi_cantidad = pd.DataFrame({
+        'Ejecutivo': kpi_ranking.index, 
+        'Corregidas': ordenes_corregidas_kpi.reindex(kpi_ranking.index, fill_value=0).values,
+        'Asignadas': total_ordenes_kpi.reindex(kpi_ranking.index, fill_value=0).values
+    })
+    return df_kpi_resolutividad, df_kpi_cantidad
+
+
+def calcular_tab_ranking(version_datos, cubo_f, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    df_kpi_resolutividad, df_kpi_cantidad = calcular_tablas_ranking(cubo_f)
+    if not df_kpi_resolutividad.empty:
         ranking_items = []
-        for i, (ejecutivo, score) in enumerate(kpi_ranking.items()):
+        for i, (ejecutivo, score) in enumerate(df_kpi_resolutividad.itertuples(index=False)):
             color = "success" if i == 0 else "info" if i == 1 else "primary" if i == 2 else "secondary"
             icon = "bi bi-trophy-fill" if i == 0 else "bi bi-award-fill" if i == 1 else "bi bi-star-fill"
             ranking_items.append(
@@ -399,12 +1307,6 @@ def actualizar_dashboard_completo(json_data, meses, quincena, semanas, torres, e
             dbc.ListGroup(ranking_items, flush=True, className="border-0")
         ]), className="shadow-sm border-0 rounded-lg")
         
-        df_kpi_cantidad = pd.DataFrame({
-            'Ejecutivo': kpi_ranking.index, 
-            'Corregidas': ordenes_corregidas_kpi.reindex(kpi_ranking.index, fill_value=0).values,
-            'Asignadas': total_ordenes_kpi.reindex(kpi_ranking.index, fill_value=0).values
-        })
-        
         quantity_items = []
         for index, row in df_kpi_cantidad.iterrows():
             ejecutivo = row['Ejecutivo']
@@ -427,31 +1329,398 @@ def actualizar_dashboard_completo(json_data, meses, quincena, semanas, torres, e
             html.H4("Detalle de Gestiones", className="card-title text-center"),
             dbc.ListGroup(quantity_items, flush=True, className="border-0")
         ]), className="shadow-sm border-0 rounded-lg")
-        
-        # Preparar datos para descarga
-        df_kpi_cantidad_download = df_kpi_cantidad # Asegurarse de usar la variable correcta
-        
     else:
-        alert_msg = dbc.Alert("No hay datos para generar el ranking KPI con los ejecutivos y filtros seleccionados.", color="info")
-        kpi_ranking_card = alert_msg
-        kpi_quantity_card = alert_msg
-        df_kpi_resolutividad = pd.DataFrame()
-        df_kpi_cantidad_download = pd.DataFrame() 
-    
-    return (
-        data_mensual, cols_mensual, 
-        data_torre, cols_torre, 
-        data_status, cols_status, 
-        data_ejecutivo_conteo, cols_ejecutivo_conteo, 
-        data_ejecutivo_porcentaje, cols_ejecutivo_porcentaje, 
-        tarjetas, tarjetas, tarjetas, 
-        fig_torta_torre, fig_bar_resolutividad, fig_volumen_ejec, fig_composicion_status,
-        kpi_ranking_card,
-        kpi_quantity_card,
-        df_kpi_resolutividad.to_json(orient='split', index=False),
-        df_kpi_cantidad_download.to_json(orient='split', index=False),
-        dff.to_json(date_format='iso', orient='split')
+        kpi_ranking_card = NO_RANKING_MSG
+        kpi_quantity_card = NO_RANKING_MSG
+
+    return kpi_ranking_card, kpi_quantity_card
+
+
+# --- PAYLOAD PARA EL NAVEGADOR (MODO_RENDER = 'cliente') ---
+def calcular_agregados_cliente(cubo_f):
+    """Conteos compactos del cubo filtrado para los clientside callbacks; {} si no hay datos.
+
+    'ejecutivo_status' es la matriz de cantidades (ejecutivo x status) y alcanza para las tarjetas,
+    los gráficos por ejecutivo y el ranking; las torres y los días van como totales.
+    """
+    if cubo_f.empty:
+        return {}
+    i_ejecutivo, ejecutivos = pd.factorize(cubo_f[COLUMNA_ANALISTA], sort=True)
+    i_status, status = pd.factorize(cubo_f[COLUMNA_STATUS], sort=True)
+    matriz = np.bincount(i_ejecutivo * len(status) + i_status, weights=cubo_f['Cantidad'].to_numpy(), minlength=len(ejecutivos) * len(status))
+    por_torre = cubo_f.groupby(COLUMNA_TORRE)['Cantidad'].sum()
+    por_dia = cubo_f.groupby('Fecha_Dia')['Cantidad'].sum()
+    return {
+        'ejecutivos': ejecutivos.tolist(),
+        'status': status.tolist(),
+        'ejecutivo_status': matriz.astype(np.int64).reshape(len(ejecutivos), len(status)).tolist(),
+        'torres': por_torre.index.tolist(),
+        'cantidad_torre': por_torre.tolist(),
+        'dias': por_dia.index.strftime('%Y-%m-%d').tolist(),
+        'cantidad_dia': por_dia.tolist(),
+    }
+
+
+def configuracion_cliente():
+    """Datos fijos para assets/dashboard.js: plantilla de gráficos, nombres de columnas y mensajes."""
+    return {
+        'plantilla': PLANTILLA_GRAFICOS,
+        'colores': COLORES_GRAFICOS,
+        'columnas': {'torre': COLUMNA_TORRE, 'ejecutivo': COLUMNA_ANALISTA, 'status': COLUMNA_STATUS, 'orden': COLUMNA_ORDEN},
+        'ejecutivos_ranking': EJECUTIVOS_KPI_RANKING,
+        'sin_datos': NO_DATA_MSG,
+        'sin_ranking': NO_RANKING_MSG,
+        'figura_vacia': EMPTY_FIG,
+    }
+
+
+CALCULOS_POR_TAB = {
+    TAB_MENSUAL: calcular_tab_mensual,
+    TAB_DIARIO: calcular_tab_diario,
+    TAB_GRAFICOS: calcular_tab_graficos,
+    TAB_RANKING: calcular_tab_ranking,
+}
+
+RESULTADOS_VACIOS_POR_TAB = {
+    TAB_MENSUAL: (EMPTY_DF_DICT, EMPTY_COLS),
+    TAB_DIARIO: (EMPTY_COLS,) * 4,
+    TAB_GRAFICOS: (EMPTY_FIG,) * 4,
+    TAB_RANKING: (NO_DATA_MSG, NO_DATA_MSG),
+}
+
+# Pestañas cuyas salidas terminan con las tarjetas KPI; en modo 'cliente' las arma el navegador
+TABS_CON_TARJETAS = (TAB_MENSUAL, TAB_DIARIO, TAB_GRAFICOS)
+
+
+def _salidas_tarjetas(id_contenedor):
+    return [] if MODO_RENDER == 'cliente' else [Output(id_contenedor, 'children')]
+
+
+def actualizar_tab(tab, version_datos, pestana_activa, clave_mostrada, meses, quincena, semanas, torres, ejecutivos, modo_tiempo):
+    """Calcula (o toma de la caché) las salidas de una pestaña, solo si está visible y sus datos cambiaron.
+
+    Devuelve las salidas de la pestaña más la clave mostrada, que se guarda en el navegador para
+    no recalcular al volver a la pestaña con los mismos filtros y la misma versión de datos.
+    """
+    if not version_datos or pestana_activa != tab:
+        raise PreventUpdate
+    clave = (resolver_version(version_datos), tab) + normalizar_filtros(meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+    clave_json = json.dumps(clave)
+    if clave_json == clave_mostrada:
+        raise PreventUpdate
+
+    resultado = leer_resultado(clave)
+    if resultado is None:
+        cubo_f = obtener_cubo_filtrado(clave[0], meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+        if cubo_f.empty:
+            resultado = RESULTADOS_VACIOS_POR_TAB[tab]
+        else:
+            resultado = CALCULOS_POR_TAB[tab](clave[0], cubo_f, meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+        if tab in TABS_CON_TARJETAS and MODO_RENDER != 'cliente':
+            resultado = tuple(resultado) + ((calcular_tarjetas(cubo_f) if not cubo_f.empty else NO_DATA_MSG),)
+        guardar_resultado(clave, resultado)
+    return tuple(resultado) + (clave_json,)
+
+
+ENTRADAS_FILTROS = [
+    Input('store-main-data', 'data'),
+    Input('tabs-dashboard', 'active_tab'),
+    Input('filtro-mes', 'value'),
+    Input('filtro-quincena', 'value'),
+    Input('filtro-semana', 'value'),
+    Input('filtro-torre', 'value'),
+    Input('filtro-ejecutivo', 'value'),
+    State('modo-filtro-tiempo', 'value'),
+]
+
+
+@callback(
+    Output('tabla-resumen-mensual', 'data'), Output('tabla-resumen-mensual', 'columns'),
+    *_salidas_tarjetas('tarjetas-kpi-mensual'),
+    Output('store-clave-tab-mensual', 'data'),
+    *ENTRADAS_FILTROS,
+    State('store-clave-tab-mensual', 'data')
+)
+def actualizar_tab_mensual(version_datos, pestana_activa, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, clave_mostrada):
+    return actualizar_tab(TAB_MENSUAL, version_datos, pestana_activa, clave_mostrada, meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+
+
+@callback(
+    *[Output(id_tabla, 'columns') for id_tabla in TABLAS_DIARIAS],
+    *_salidas_tarjetas('tarjetas-kpi-diario'),
+    Output('store-clave-tab-diario', 'data'),
+    *ENTRADAS_FILTROS,
+    State('store-clave-tab-diario', 'data')
+)
+def actualizar_tab_diario(version_datos, pestana_activa, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, clave_mostrada):
+    return actualizar_tab(TAB_DIARIO, version_datos, pestana_activa, clave_mostrada, meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+
+
+# --- PAGINACIÓN, ORDEN Y FILTRO DE LAS TABLAS DIARIAS ---
+# Condición de filter_query: {columna} operador valor, o {columna} is <tipo> para los operadores
+# unarios. El operador puede venir como símbolo o como palabra (gt, eq...) y con prefijo de
+# mayúsculas/minúsculas (s o i); son todos los que emite el filtro de columna de la DataTable.
+# Como en la DataTable, sin prefijo se usa el 'case' de filter_options para todos los operadores.
+_PATRON_FILTRO = re.compile(
+    r"^\{(?P<columna>.+?)\}\s+(?:(?P<unario>is\s+(?:blank|bool|even|nil|num|object|odd|prime|str))"
+    r"|(?P<caso>[si]?)(?P<operador>>=|<=|!=|<|>|=|ge|le|ne|lt|gt|eq|contains|datestartswith)\s+(?P<valor>.+))$"
+)
+_ALIAS_OPERADORES = {'ge': '>=', 'le': '<=', 'ne': '!=', 'lt': '<', 'gt': '>', 'eq': '='}
+# Valores entre comillas (con escapes \"); re.split los conserva para no cortar un '&&' citado
+_PATRON_VALOR_CITADO = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)''')
+
+
+def _partes_filtro(filter_query):
+    """Condiciones de filter_query separadas por '&&' fuera de los valores entre comillas."""
+    partes = ['']
+    for i, trozo in enumerate(_PATRON_VALOR_CITADO.split(filter_query)):
+        if i % 2:
+            partes[-1] += trozo
+            continue
+        primero, *resto = trozo.split('&&')
+        partes[-1] += primero
+        partes.extend(resto)
+    return [parte.strip() for parte in partes if parte.strip()]
+
+
+def _separar_filtro(parte):
+    """Divide una condición de filter_query en (columna, operador, valor, caso); None si no se reconoce."""
+    coincidencia = _PATRON_FILTRO.match(parte.strip())
+    if not coincidencia:
+        return None
+    if coincidencia['unario']:
+        return coincidencia['columna'], ' '.join(coincidencia['unario'].split()), None, ''
+    valor = coincidencia['valor'].strip()
+    if valor[0] in ('"', "'", '`'):
+        # Una comilla sin cerrar o texto tras el valor citado no es una condición válida
+        if not _PATRON_VALOR_CITADO.fullmatch(valor):
+            return None
+        valor = re.sub(r'\\(.)', r'\1', valor[1:-1])
+    operador = coincidencia['operador']
+    return coincidencia['columna'], _ALIAS_OPERADORES.get(operador, operador), valor, coincidencia['caso']
+
+
+def _es_primo(valor):
+    if not isinstance(valor, (int, float, np.number)) or isinstance(valor, (bool, np.bool_)) or pd.isna(valor) or valor != int(valor) or valor < 2:
+        return False
+    valor = int(valor)
+    return all(valor % divisor for divisor in range(2, math.isqrt(valor) + 1))
+
+
+# Operadores unarios (is ...): máscara sobre los valores tal como se muestran
+_FILTROS_UNARIOS = {
+    'is blank': lambda serie: serie.isna() | (serie.astype(str).str.strip() == ''),
+    'is nil': lambda serie: serie.isna(),
+    'is bool': lambda serie: serie.map(lambda v: isinstance(v, (bool, np.bool_))),
+    'is num': lambda serie: pd.to_numeric(serie, errors='coerce').notna() & ~serie.map(lambda v: isinstance(v, (bool, np.bool_, str))),
+    'is str': lambda serie: serie.map(lambda v: isinstance(v, str)),
+    'is object': lambda serie: serie.map(lambda v: isinstance(v, (dict, list))),
+    'is even': lambda serie: pd.to_numeric(serie, errors='coerce').mod(2).eq(0),
+    'is odd': lambda serie: pd.to_numeric(serie, errors='coerce').mod(2).eq(1),
+    'is prime': lambda serie: serie.map(_es_primo),
+}
+
+
+def valores_mostrados(serie):
+    """Porcentajes (fracciones) como el número que muestra FORMATO_PORCENTAJE: 0.504 -> 50."""
+    return np.floor(serie * 100 + 0.5).astype('Int64')
+
+
+def filtrar_tabla(df, filter_query, columnas_porcentaje=(), caso_por_defecto='sensitive'):
+    """Aplica el filter_query de la DataTable (condiciones unidas con '&&') sobre el frame.
+
+    En las columnas de columnas_porcentaje se compara con el porcentaje mostrado ('> 50' o
+    '> 50%'), no con la fracción. Los textos se comparan sin distinguir mayúsculas solo con el
+    prefijo 'i', o sin prefijo si caso_por_defecto es 'insensitive' (filter_options de la tabla).
+    Devuelve el frame filtrado y las condiciones que no se pudieron aplicar, para avisar en la
+    tabla en lugar de ignorarlas en silencio.
+    """
+    if not filter_query:
+        return df, []
+    mascara = pd.Series(True, index=df.index)
+    rechazadas = []
+    for parte in _partes_filtro(filter_query):
+        condicion = _separar_filtro(parte)
+        if condicion is None or condicion[0] not in df.columns:
+            rechazadas.append(parte)
+            continue
+        columna, operador, valor, caso = condicion
+        sin_mayusculas = caso == 'i' or (not caso and caso_por_defecto == 'insensitive')
+        serie = valores_mostrados(df[columna]) if columna in columnas_porcentaje else df[columna]
+        if operador in _FILTROS_UNARIOS:
+            mascara &= _FILTROS_UNARIOS[operador](serie).fillna(False).astype(bool)
+            continue
+        if columna in columnas_porcentaje:
+            valor = valor.rstrip().rstrip('%')
+        if operador in ('contains', 'datestartswith'):
+            texto = serie.astype(str)
+            if sin_mayusculas:
+                texto, valor = texto.str.lower(), valor.lower()
+            mascara &= texto.str.contains(valor, regex=False) if operador == 'contains' else texto.str.startswith(valor)
+            continue
+        if pd.api.types.is_numeric_dtype(serie):
+            try:
+                valor = float(valor)
+            except ValueError:
+                rechazadas.append(parte)
+                continue
+        else:
+            serie = serie.astype(str)
+            if sin_mayusculas:
+                serie, valor = serie.str.lower(), valor.lower()
+        comparar = {'>=': serie.ge, '<=': serie.le, '<': serie.lt, '>': serie.gt, '!=': serie.ne, '=': serie.eq}[operador]
+        mascara &= comparar(valor)
+    return df[mascara], rechazadas
+
+
+def aviso_filtro(rechazadas):
+    """Aviso bajo la tabla con las condiciones del filtro que no se aplicaron."""
+    if not rechazadas:
+        return None
+    return f"Filtro no aplicado (valor u operador no válido para la columna): {'; '.join(rechazadas)}"
+
+
+def pagina_tabla(df, pagina, filas_por_pagina, sort_by, filter_query):
+    """Filtra, ordena y recorta el frame a la página pedida; la fila 'Total General' va en todas.
+
+    Devuelve las filas de la página, el total de páginas, la página y las condiciones rechazadas.
+    """
+    id_fila = df.columns[0]
+    es_total = df[id_fila] == 'Total General'
+    fila_total, dff = df[es_total], df[~es_total]
+    dff, rechazadas = filtrar_tabla(dff, filter_query, df.attrs.get('columnas_porcentaje', ()),
+                                    PROPIEDADES_TABLA_PAGINADA['filter_options']['case'])
+    if sort_by:
+        dff = dff.sort_values([orden['column_id'] for orden in sort_by],
+                              ascending=[orden['direction'] == 'asc' for orden in sort_by], kind='stable')
+    filas_por_pagina = filas_por_pagina or FILAS_POR_PAGINA_TABLAS
+    total_paginas = max(math.ceil(len(dff) / filas_por_pagina), 1)
+    pagina = min(pagina or 0, total_paginas - 1)
+    dff = dff.iloc[pagina * filas_por_pagina:(pagina + 1) * filas_por_pagina]
+    return pd.concat([dff, fila_total]).to_dict('records'), total_paginas, pagina, rechazadas
+
+
+@callback(
+    *[Output(id_tabla, 'data') for id_tabla in TABLAS_DIARIAS],
+    *[Output(id_tabla, 'page_count') for id_tabla in TABLAS_DIARIAS],
+    *[Output(id_tabla, 'page_current') for id_tabla in TABLAS_DIARIAS],
+    *[Output(f'aviso-filtro-{id_tabla}', 'children') for id_tabla in TABLAS_DIARIAS],
+    Input('store-clave-tab-diario', 'data'),
+    *[Input(id_tabla, propiedad) for id_tabla in TABLAS_DIARIAS for propiedad in ('page_current', 'page_size', 'sort_by', 'filter_query')],
+    prevent_initial_call=True
+)
+def paginar_tablas_diarias(clave_mostrada, *estados_tablas):
+    """Envía solo la página visible; con datos nuevos todas vuelven a la primera página."""
+    if not clave_mostrada:
+        raise PreventUpdate
+    clave = _a_tupla(json.loads(clave_mostrada))
+    tablas = obtener_tablas_diarias(clave)
+    disparador = dash.ctx.triggered_id
+    salidas = {'data': [], 'page_count': [], 'page_current': [], 'aviso': []}
+    for i, id_tabla in enumerate(TABLAS_DIARIAS):
+        pagina, filas_por_pagina, sort_by, filter_query = estados_tablas[i * 4:(i + 1) * 4]
+        if disparador not in ('store-clave-tab-diario', id_tabla):
+            for nombre in salidas:
+                salidas[nombre].append(dash.no_update)
+            continue
+        if disparador == 'store-clave-tab-diario':
+            pagina = 0
+        datos, total_paginas, pagina, rechazadas = pagina_tabla(tablas[id_tabla][0], pagina, filas_por_pagina, sort_by, filter_query)
+        salidas['data'].append(datos)
+        salidas['page_count'].append(total_paginas)
+        salidas['page_current'].append(pagina)
+        salidas['aviso'].append(aviso_filtro(rechazadas))
+    return (*salidas['data'], *salidas['page_count'], *salidas['page_current'], *salidas['aviso'])
+
+
+if MODO_RENDER == 'cliente':
+    # Pestañas que muestran algo armado con el payload (tarjetas, gráficos o ranking)
+    TABS_CON_AGREGADOS = TABS_CON_TARJETAS + (TAB_RANKING,)
+
+    @callback(
+        Output('store-agregados', 'data'),
+        Output('store-clave-agregados', 'data'),
+        *ENTRADAS_FILTROS,
+        State('store-clave-agregados', 'data')
+    )
+    def actualizar_agregados(version_datos, pestana_activa, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, clave_mostrada):
+        """Payload de conteos para las tarjetas, los gráficos y el ranking que arma el navegador.
+
+        Igual que actualizar_tab, solo se envía si la pestaña visible lo usa y sus datos cambiaron.
+        """
+        if not version_datos or pestana_activa not in TABS_CON_AGREGADOS:
+            raise PreventUpdate
+        clave = (resolver_version(version_datos), 'agregados') + normalizar_filtros(meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+        clave_json = json.dumps(clave)
+        if clave_json == clave_mostrada:
+            raise PreventUpdate
+        resultado = leer_resultado(clave)
+        if resultado is None:
+            resultado = calcular_agregados_cliente(obtener_cubo_filtrado(clave[0], meses, quincena, semanas, torres, ejecutivos, modo_tiempo))
+            guardar_resultado(clave, resultado)
+        return resultado, clave_json
+
+    clientside_callback(
+        ClientsideFunction(namespace='dashboard_kpi', function_name='tarjetas'),
+        Output('tarjetas-kpi-mensual', 'children'),
+        Output('tarjetas-kpi-diario', 'children'),
+        Output('tarjetas-kpi-graficos', 'children'),
+        Input('store-agregados', 'data'),
+        State('store-config-cliente', 'data')
+    )
+    clientside_callback(
+        ClientsideFunction(namespace='dashboard_kpi', function_name='graficos'),
+        Output('grafico-torta-torre', 'figure'),
+        Output('grafico-barras-resolutividad', 'figure'),
+        Output('grafico-volumen-ejecutivo', 'figure'),
+        Output('grafico-composicion-status', 'figure'),
+        Input('store-agregados', 'data'),
+        State('store-config-cliente', 'data')
+    )
+    clientside_callback(
+        ClientsideFunction(namespace='dashboard_kpi', function_name='ranking'),
+        Output('kpi-ranking-container', 'children'),
+        Output('kpi-quantity-ranking-container', 'children'),
+        Input('store-agregados', 'data'),
+        State('store-config-cliente', 'data')
+    )
+
+else:
+    @callback(
+        Output('grafico-torta-torre', 'figure'),
+        Output('grafico-barras-resolutividad', 'figure'),
+        Output('grafico-volumen-ejecutivo', 'figure'),
+        Output('grafico-composicion-status', 'figure'),
+        Output('tarjetas-kpi-graficos', 'children'),
+        Output('store-clave-tab-graficos', 'data'),
+        *ENTRADAS_FILTROS,
+        State('store-clave-tab-graficos', 'data')
+    )
+    def actualizar_tab_graficos(version_datos, pestana_activa, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, clave_mostrada):
+        return actualizar_tab(TAB_GRAFICOS, version_datos, pestana_activa, clave_mostrada, meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+
+
+    @callback(
+        Output('kpi-ranking-container', 'children'),
+        Output('kpi-quantity-ranking-container', 'children'),
+        Output('store-clave-tab-ranking', 'data'),
+        *ENTRADAS_FILTROS,
+        State('store-clave-tab-ranking', 'data')
     )
+    def actualizar_tab_ranking(version_datos, pestana_activa, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, clave_mostrada):
+        return actualizar_tab(TAB_RANKING, version_datos, pestana_activa, clave_mostrada, meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+
+
+@callback(
+    Output('btn-download-ranking', 'href'),
+    *ENTRADAS_FILTROS,
+    Input('interval-enlace-ranking', 'n_intervals')
+)
+def actualizar_enlace_ranking(version_datos, pestana_activa, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, n_intervals):
+    """Enlace firmado del ranking; se regenera con los filtros y cada media vigencia para que no expire."""
+    if not version_datos or pestana_activa != TAB_RANKING:
+        raise PreventUpdate
+    return crear_enlace_descarga('ranking', resolver_version(version_datos), meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
 
 @callback(
     Output('filtro-mes', 'value'), Output('filtro-quincena', 'value'), Output('filtro-semana', 'value'),
@@ -466,10 +1735,11 @@ def limpiar_filtros(n_clicks):
 
 @callback(
     Output('download-preview-container', 'children'),
-    Output('store-download-raw-data', 'data'),
-    Output('store-resumen-conteo-data', 'data'),
-    Output('store-resumen-porcentaje-data', 'data'),
+    Output('btn-download-all', 'href'),
     Output('btn-download-all', 'disabled'),
+    Output('btn-download-all', 'children'),
+    Output('btn-download-resumenes', 'href'),
+    Output('btn-download-resumenes', 'style'),
     Input('btn-generate-download', 'n_clicks'),
     State('filtro-mes', 'value'),
     State('filtro-quincena', 'value'),
@@ -479,108 +1749,369 @@ def limpiar_filtros(n_clicks):
     State('modo-filtro-tiempo', 'value'),
     State('download-date-picker', 'start_date'),
     State('download-date-picker', 'end_date'),
+    State('formato-descarga', 'value'),
     State('store-main-data', 'data'),
+    State('store-sesion', 'data'),
+    background=True,
+    progress=[Output('progreso-descarga', 'value'), Output('progreso-descarga', 'label')],
+    running=[
+        (Output('btn-generate-download', 'disabled'), True, False),
+        (Output('contenedor-progreso-descarga', 'style'), {}, {'display': 'none'}),
+    ],
+    cancel=[Input('btn-cancelar-descarga', 'n_clicks')],
     prevent_initial_call=True
 )
-def generate_download_file(n_clicks, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, start_date, end_date, json_data):
-    if not n_clicks or not start_date or not end_date or not json_data:
-        raise PreventUpdate
-    
-    df = pd.read_json(io.StringIO(json_data), orient='split')
-    df[COLUMNA_FECHA] = pd.to_datetime(df[COLUMNA_FECHA])
-    dff = df.copy()
-    if meses: dff = dff[dff['Mes'].isin(meses)]
-    if modo_tiempo == 'quincena' and quincena:
-        dff = dff[dff[COLUMNA_FECHA].dt.day <= 15 if quincena == 1 else dff[COLUMNA_FECHA].dt.day > 15]
-    elif modo_tiempo == 'semana' and semanas:
-        dff = dff[dff['Semana_Num'].isin(semanas)]
-    if torres: dff = dff[dff[COLUMNA_TORRE].isin(torres)]
-    if ejecutivos: dff = dff[dff[COLUMNA_ANALISTA].isin(ejecutivos)]
-    start_date_dt = pd.to_datetime(start_date)
-    end_date_dt = pd.to_datetime(end_date)
-    dff_download = dff[(dff[COLUMNA_FECHA] >= start_date_dt) & (dff[COLUMNA_FECHA] <= end_date_dt)]
-    if dff_download.empty:
-        return dbc.Alert("No hay datos para los filtros y rango de fechas seleccionados.", color="info"), None, None, None, True
-    df_conteo, _, _ = crear_tabla_conteo_diario(dff_download, COLUMNA_ANALISTA)
-    df_porcentaje, _, _ = crear_tabla_porcentaje_corregido(dff_download, COLUMNA_ANALISTA)
-    preview_table = dash_table.DataTable(
-        data=dff_download.head(10).to_dict('records'),
-        columns=[{'name': i, 'id': i} for i in dff_download.columns if i not in ['Year', 'Semana_Num', 'WeekStartDate', 'WeekEndDate', 'WeekLabel']],
-        page_size=10,
-        style_table={'overflowX': 'auto', 'marginTop': '10px'},
-        style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'},
-        style_cell={'textAlign': 'left', 'padding': '8px'}
-    )
-    preview_content = [html.H5(f"Vista previa de los datos detallados (primeras 10 de {len(dff_download)} filas):", className="text-secondary"), preview_table]
-    return (preview_content, dff_download.to_json(date_format='iso', orient='split'),
-            df_conteo.to_json(orient='split'), df_porcentaje.to_json(orient='split'), False)
+def generate_download_file(set_progress, n_clicks, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, start_date, end_date, formato, version_datos, sesion):
+    """Corre en un proceso aparte: filtra las gestiones y escribe los archivos que sirven los enlaces.
 
-@callback(
-    Output("download-excel", "data"),
-    Input("btn-download-all", "n_clicks"),
-    State('store-download-raw-data', 'data'),
-    State('store-resumen-conteo-data', 'data'),
-    State('store-resumen-porcentaje-data', 'data'),
-    prevent_initial_call=True,
-)
-def download_all_in_one_excel(n_clicks, json_raw, json_conteo, json_porcentaje):
-    if not n_clicks or not json_raw or not json_conteo or not json_porcentaje:
+    El proceso no tiene la petición ni la cookie; la sesión llega en store-sesion, que el layout
+    llenó desde la cookie, y los enlaces solo sirven a esa sesión.
+    """
+    if not n_clicks or not start_date or not end_date or not version_datos or not sesion:
         raise PreventUpdate
-        
-    df_raw = pd.read_json(io.StringIO(json_raw), orient='split')
-    df_conteo = pd.read_json(io.StringIO(json_conteo), orient='split')
-    df_porcentaje = pd.read_json(io.StringIO(json_porcentaje), orient='split')
-    if COLUMNA_FECHA in df_raw.columns:
-        df_raw[COLUMNA_FECHA] = pd.to_datetime(df_raw[COLUMNA_FECHA]).dt.date
-    cols_to_drop = ['Year', 'Semana_Num', 'WeekStartDate', 'WeekEndDate', 'WeekLabel']
-    df_raw = df_raw.drop(columns=[col for col in cols_to_drop if col in df_raw.columns])
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_raw.to_excel(writer, sheet_name='Datos Detallados', index=False)
-        df_conteo.to_excel(writer, sheet_name='Resumen Cantidad', index=False)
-        df_porcentaje.to_excel(writer, sheet_name='Resumen Resolutividad', index=False)
-    output.seek(0)
+
+    formato = formato if formato in FORMATOS_DESCARGA else 'xlsx'
+    filtros = (meses, quincena, semanas, torres, ejecutivos, modo_tiempo)
+    with turno_descarga(set_progress):
+        set_progress((5, "Filtrando gestiones..."))
+        dff_download = obtener_gestiones_filtradas(version_datos, *filtros, pd.to_datetime(start_date), pd.to_datetime(end_date))
+        if dff_download.empty:
+            return dbc.Alert("No hay datos para los filtros y rango de fechas seleccionados.", color="info"), None, True, FORMATOS_DESCARGA[formato]['boton'], None, {'display': 'none'}
+        preview_table = dash_table.DataTable(
+            data=dff_download.head(10).to_dict('records'),
+            columns=[{'name': i, 'id': i} for i in dff_download.columns if i not in ['Year', 'Semana_Num', 'WeekStartDate', 'WeekEndDate', 'WeekLabel']],
+            page_size=10,
+            style_table={'overflowX': 'auto', 'marginTop': '10px'},
+            style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'},
+            style_cell={'textAlign': 'left', 'padding': '8px'}
+        )
+        preview_content = [html.H5(f"Vista previa de los datos detallados (primeras 10 de {len(dff_download)} filas):", className="text-secondary"), preview_table]
+
+        purgar_descargas_preparadas()
+        version = resolver_version(version_datos)
+        datos = datos_descarga('completo', version, *filtros, start_date, end_date, formato, sesion)
+        # Con xlsx el archivo completo ya incluye las hojas de resumen
+        fin_completo = 95 if formato == 'xlsx' else 80
+        datos['archivo'], datos['nombre_archivo'] = preparar_archivo_descarga(
+            datos, dff_download, avance_descarga(set_progress, 20, fin_completo, f"Escribiendo {FORMATOS_DESCARGA[formato]['opcion']}..."))
+        enlace = firmar_enlace_descarga(datos)
+        if formato == 'xlsx':
+            return preview_content, enlace, False, FORMATOS_DESCARGA[formato]['boton'], None, {'display': 'none'}
+
+        datos_resumenes = datos_descarga('resumenes', version, *filtros, start_date, end_date, sesion=sesion)
+        datos_resumenes['archivo'], datos_resumenes['nombre_archivo'] = preparar_archivo_descarga(
+            datos_resumenes, dff_download, avance_descarga(set_progress, fin_completo, 95, "Escribiendo resúmenes..."))
+        return preview_content, enlace, False, FORMATOS_DESCARGA[formato]['boton'], firmar_enlace_descarga(datos_resumenes), {}
+
+# --- DESCARGAS (RUTA FLASK) ---
+# Los botones de descarga solo llevan un enlace firmado con la versión de datos, los filtros y el
+# formato, sin pasar el archivo por el callback ni por base64. Los enlaces de la pestaña Descargar
+# apuntan al archivo que dejó listo generate_download_file y vencen con él (pasado
+# DESCARGAS_PREPARADAS_TTL_SEGUNDOS hay que generarlo de nuevo); solo el xlsx del ranking se arma
+# en la ruta, dentro de un turno de descarga, y su enlace vale DESCARGA_VIGENCIA_SEGUNDOS. El xlsx
+# se escribe fila a fila (constant_memory), el CSV por bloques y el Parquet con pyarrow. Cada
+# enlace lleva la sesión del navegador que lo generó y la ruta rechaza las demás.
+DESCARGA_VIGENCIA_SEGUNDOS = int(os.environ.get("DESCARGA_VIGENCIA_SEGUNDOS", 12 * 3600))
+FILAS_POR_BLOQUE_DESCARGA = 50_000
+COLUMNAS_CALENDARIO = ['Year', 'Semana_Num', 'WeekStartDate', 'WeekEndDate', 'WeekLabel']
+_firmador_descargas = URLSafeTimedSerializer(SECRET_KEY, salt='descargas-xlsx')
+
+
+def id_sesion():
+    """Identificador de la sesión del navegador, guardado en la cookie firmada de Flask."""
+    if 'id_sesion' not in session:
+        session['id_sesion'] = uuid.uuid4().hex
+    return session['id_sesion']
+
+
+def datos_descarga(tipo, version, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio=None, fecha_fin=None, formato='xlsx', sesion=None):
+    """Contenido del enlace firmado: lo necesario para recalcular la descarga y la sesión que puede usarlo."""
+    return {
+        'tipo': tipo, 'version': version,
+        'filtros': [meses, quincena, semanas, torres, ejecutivos, modo_tiempo],
+        'fechas': [fecha_inicio, fecha_fin],
+        'formato': formato,
+        'sesion': sesion,
+    }
+
+
+def firmar_enlace_descarga(datos):
+    """Enlace firmado (y con vencimiento) a la ruta de descarga."""
+    return app.get_relative_path(f"/descargas/{_firmador_descargas.dumps(datos)}")
+
+
+def crear_enlace_descarga(tipo, version, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio=None, fecha_fin=None, formato='xlsx'):
+    """Enlace a la ruta de descarga para estos filtros y formato; el archivo se arma al pedirlo."""
+    return firmar_enlace_descarga(datos_descarga(tipo, version, meses, quincena, semanas, torres, ejecutivos, modo_tiempo, fecha_inicio, fecha_fin, formato, id_sesion()))
+
+
+def preparar_consolidado(dff):
+    """Gestiones para exportar: la fecha sin hora y sin las columnas de calendario internas."""
+    dff = dff.drop(columns=[col for col in COLUMNAS_CALENDARIO if col in dff.columns])
+    if COLUMNA_FECHA in dff.columns:
+        dff[COLUMNA_FECHA] = dff[COLUMNA_FECHA].dt.date
+    return dff
+
+
+def preparar_detalle(dff):
+    """Como preparar_consolidado, pero la fecha queda como datetime64 a medianoche (vectorizado)."""
+    dff = dff.drop(columns=[col for col in COLUMNAS_CALENDARIO if col in dff.columns])
+    if COLUMNA_FECHA in dff.columns:
+        dff[COLUMNA_FECHA] = dff[COLUMNA_FECHA].dt.normalize()
+    return dff
+
+
+def calcular_resumenes_descarga(dff):
+    """Hojas de resumen (cantidad y resolutividad) de las gestiones a descargar."""
+    cubo = construir_cubo(dff) if not dff.empty else pd.DataFrame()
+    cruce = calcular_cruce_diario(cubo, COLUMNA_ANALISTA) if not cubo.empty else None
+    df_conteo, _, _ = crear_tabla_conteo_diario(cubo, COLUMNA_ANALISTA, cruce=cruce)
+    df_porcentaje, _, _ = crear_tabla_porcentaje_corregido(cubo, COLUMNA_ANALISTA, cruce=cruce)
+    return {
+        'Resumen Cantidad': df_conteo,
+        'Resumen Resolutividad': df_porcentaje,
+    }
+
+
+def construir_hojas_descarga(datos, dff=None):
+    """Hojas {nombre: DataFrame} y nombre de archivo para el contenido del enlace firmado.
+
+    dff son las gestiones ya filtradas para el enlace ('completo' y 'resumenes').
+    """
+    version = resolver_version(datos['version'])
+    filtros = datos['filtros']
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"reporte_completo_{timestamp}.xlsx"
-    return dcc.send_bytes(output.read(), filename=filename)
+    if datos['tipo'] in ('completo', 'resumenes'):
+        resumenes = calcular_resumenes_descarga(dff)
+        if datos['tipo'] == 'resumenes':
+            return resumenes, f"resumenes_{timestamp}.xlsx"
+        return {'Datos Detallados': preparar_consolidado(dff), **resumenes}, f"reporte_completo_{timestamp}.xlsx"
 
-@callback(
-    Output("download-excel", "data", allow_duplicate=True),
-    Input("btn-download-ranking", "n_clicks"),
-    State('store-kpi-resolutividad-data', 'data'),
-    State('store-kpi-cantidad-data', 'data'),
-    State('store-filtered-data', 'data'), 
-    prevent_initial_call=True,
-)
-def download_ranking_excel(n_clicks, json_resolutividad, json_cantidad, json_consolidado):
-    if not n_clicks or not json_resolutividad or not json_cantidad or not json_consolidado:
-        raise PreventUpdate
-    
-    df_resolutividad = pd.read_json(io.StringIO(json_resolutividad), orient='split')
-    df_cantidad = pd.read_json(io.StringIO(json_cantidad), orient='split')
-    df_consolidado = pd.read_json(io.StringIO(json_consolidado), orient='split')
-    
+    df_resolutividad, df_cantidad = calcular_tablas_ranking(obtener_cubo_filtrado(version, *filtros))
     if not df_resolutividad.empty:
-        df_resolutividad['Resolutividad'] = pd.to_numeric(df_resolutividad['Resolutividad'])
         df_resolutividad['Resolutividad'] = df_resolutividad['Resolutividad'].apply(lambda x: f"{x:.2%}")
+    hojas = {
+        'Ranking Resolutividad': df_resolutividad,
+        'Ranking Cantidad': df_cantidad,
+        'Consolidado Filtrado': preparar_consolidado(obtener_gestiones_filtradas(version, *filtros)),
+    }
+    return hojas, f"ranking_kpi_completo_{timestamp}.xlsx"
 
-    if not df_consolidado.empty:
-        df_consolidado[COLUMNA_FECHA] = pd.to_datetime(df_consolidado[COLUMNA_FECHA]).dt.date
-        cols_to_drop = ['Year', 'Semana_Num', 'WeekStartDate', 'WeekEndDate', 'WeekLabel']
-        df_consolidado = df_consolidado.drop(columns=[col for col in cols_to_drop if col in df_consolidado.columns])
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_resolutividad.to_excel(writer, sheet_name='Ranking Resolutividad', index=False)
-        df_cantidad.to_excel(writer, sheet_name='Ranking Cantidad', index=False)
-        df_consolidado.to_excel(writer, sheet_name='Consolidado Filtrado', index=False)
-    
-    output.seek(0)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"ranking_kpi_completo_{timestamp}.xlsx"
-    
-    return dcc.send_bytes(output.read(), filename=filename)
+def escribir_xlsx_temporal(hojas, directorio=None, avance=None):
+    """Escribe las hojas en un xlsx temporal, fila a fila y por bloques, y devuelve su ruta.
+
+    avance, si se pasa, recibe la fracción de filas ya escritas después de cada bloque.
+    """
+    descriptor, ruta = tempfile.mkstemp(suffix='.xlsx', prefix='descarga_', dir=directorio)
+    os.close(descriptor)
+    libro = xlsxwriter.Workbook(ruta, {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False})
+    try:
+        formato_encabezado = libro.add_format({'bold': True, 'border': 1, 'align': 'center'})
+        formato_fecha = libro.add_format({'num_format': 'yyyy-mm-dd'})
+        formato_fecha_hora = libro.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        formato_porcentaje = libro.add_format({'num_format': '0%'})
+        filas_totales, filas_escritas = max(sum(len(df) for df in hojas.values()), 1), 0
+        for nombre, df in hojas.items():
+            hoja = libro.add_worksheet(nombre)
+            hoja.write_row(0, 0, [str(col) for col in df.columns], formato_encabezado)
+            formatos = []
+            columnas_porcentaje = set(df.attrs.get('columnas_porcentaje', ()))
+            for col in df.columns:
+                if col in columnas_porcentaje:
+                    formatos.append(formato_porcentaje)
+                elif pd.api.types.is_datetime64_any_dtype(df[col]):
+                    formatos.append(formato_fecha_hora)
+                elif pd.api.types.infer_dtype(df[col], skipna=True) == 'date':
+                    formatos.append(formato_fecha)
+                else:
+                    formatos.append(None)
+            fila_excel = 1
+            for inicio in range(0, len(df), FILAS_POR_BLOQUE_DESCARGA):
+                bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE_DESCARGA]
+                bloque = bloque.astype(object).where(bloque.notna(), None)
+                for fila in bloque.itertuples(index=False, name=None):
+                    for columna, valor in enumerate(fila):
+                        if valor is not None:
+                            hoja.write(fila_excel, columna, valor, formatos[columna])
+                    fila_excel += 1
+                filas_escritas += len(bloque)
+                if avance:
+                    avance(filas_escritas / filas_totales)
+    finally:
+        libro.close()
+    return ruta
+
+
+def generar_csv(df, comprimir=False):
+    """Genera el CSV (UTF-8 con BOM para Excel) por bloques de filas, opcionalmente en gzip."""
+    # wbits=31 produce un flujo gzip estándar que se puede emitir bloque a bloque
+    compresor = zlib.compressobj(wbits=31) if comprimir else None
+    for inicio in range(0, max(len(df), 1), FILAS_POR_BLOQUE_DESCARGA):
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE_DESCARGA].to_csv(index=False, header=(inicio == 0)).encode('utf-8')
+        if inicio == 0:
+            bloque = '\ufeff'.encode('utf-8') + bloque
+        yield compresor.compress(bloque) if compresor else bloque
+    if compresor:
+        yield compresor.flush()
+
+
+def escribir_csv_temporal(df, comprimir=False, directorio=None, avance=None):
+    """Escribe en un temporal los bloques de generar_csv y devuelve su ruta."""
+    descriptor, ruta = tempfile.mkstemp(suffix='.csv.gz' if comprimir else '.csv', prefix='descarga_', dir=directorio)
+    bloques = math.ceil(len(df) / FILAS_POR_BLOQUE_DESCARGA) or 1
+    with os.fdopen(descriptor, 'wb') as archivo:
+        for numero, bloque in enumerate(generar_csv(df, comprimir), start=1):
+            archivo.write(bloque)
+            if avance:
+                avance(min(numero / bloques, 1))
+    return ruta
+
+
+def escribir_parquet_temporal(df, directorio=None):
+    """Escribe las gestiones en un Parquet temporal (fecha como date32) y devuelve su ruta."""
+    descriptor, ruta = tempfile.mkstemp(suffix='.parquet', prefix='descarga_', dir=directorio)
+    os.close(descriptor)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    if COLUMNA_FECHA in tabla.column_names:
+        posicion = tabla.column_names.index(COLUMNA_FECHA)
+        tabla = tabla.set_column(posicion, COLUMNA_FECHA, tabla.column(COLUMNA_FECHA).cast(pa.date32()))
+    pq.write_table(tabla, ruta, row_group_size=FILAS_POR_BLOQUE_DESCARGA)
+    return ruta
+
+
+def enviar_archivo_temporal(ruta, nombre_archivo, mimetype):
+    archivo = open(ruta, 'rb')
+    try:
+        # En Linux el archivo abierto sigue legible tras borrarlo y el espacio se libera al cerrarlo
+        os.remove(ruta)
+    except OSError:
+        pass
+    return send_file(archivo, as_attachment=True, download_name=nombre_archivo, mimetype=mimetype)
+
+
+def nombre_archivo_detalle(formato):
+    return f"datos_detallados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+
+
+def preparar_archivo_descarga(datos, dff, avance=None):
+    """Escribe en DIRECTORIO_DESCARGAS el archivo del enlace a partir de las gestiones ya filtradas.
+
+    Devuelve el nombre del archivo en disco y el nombre con el que se descarga.
+    """
+    os.makedirs(DIRECTORIO_DESCARGAS, exist_ok=True)
+    formato = datos['formato']
+    if formato == 'xlsx' or datos['tipo'] != 'completo':
+        hojas, nombre_archivo = construir_hojas_descarga(datos, dff)
+        ruta = escribir_xlsx_temporal(hojas, DIRECTORIO_DESCARGAS, avance)
+    elif formato == 'parquet':
+        nombre_archivo = nombre_archivo_detalle(formato)
+        ruta = escribir_parquet_temporal(preparar_detalle(dff), DIRECTORIO_DESCARGAS)
+    else:
+        nombre_archivo = nombre_archivo_detalle(formato)
+        ruta = escribir_csv_temporal(preparar_detalle(dff), formato == 'csv.gz', DIRECTORIO_DESCARGAS, avance)
+    return os.path.basename(ruta), nombre_archivo
+
+
+def purgar_descargas_preparadas():
+    """Borra los archivos preparados cuyos enlaces ya vencieron."""
+    if not os.path.isdir(DIRECTORIO_DESCARGAS):
+        return
+    # El enlace se firma después de escribir el archivo: el margen cubre esa diferencia
+    limite = time.time() - DESCARGAS_PREPARADAS_TTL_SEGUNDOS - 60
+    for nombre in os.listdir(DIRECTORIO_DESCARGAS):
+        ruta = os.path.join(DIRECTORIO_DESCARGAS, nombre)
+        try:
+            if nombre.startswith('descarga_') and os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+
+def avance_descarga(set_progress, inicio, fin, texto):
+    """Función de avance que reporta una fracción como porcentaje entre inicio y fin de la barra."""
+    def avance(fraccion):
+        valor = int(inicio + (fin - inicio) * fraccion)
+        set_progress((valor, f"{texto} {valor}%"))
+    return avance
+
+
+def tomar_turno_descarga():
+    """Intenta tomar uno de los MAX_DESCARGAS_SIMULTANEAS turnos de exportación, compartidos entre workers.
+
+    Cada turno es un flock sobre un archivo; si el proceso termina o se cancela, el sistema lo
+    libera. Devuelve el archivo abierto (cerrarlo libera el turno) o None si están todos ocupados.
+    """
+    os.makedirs(DIRECTORIO_DESCARGAS, exist_ok=True)
+    for numero in range(max(MAX_DESCARGAS_SIMULTANEAS, 1)):
+        archivo = open(os.path.join(DIRECTORIO_DESCARGAS, f"turno_{numero}.lock"), 'a')
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            archivo.close()
+            continue
+        return archivo
+    return None
+
+
+@contextmanager
+def turno_descarga(set_progress):
+    """Espera un turno de exportación; mientras tanto la barra de progreso muestra la espera en cola."""
+    while (archivo := tomar_turno_descarga()) is None:
+        set_progress((0, "En cola: hay otras descargas en curso..."))
+        time.sleep(1)
+    try:
+        yield
+    finally:
+        archivo.close()
+
+
+def _purgar_descargas_periodicamente():
+    """Purga los archivos preparados aunque nadie genere descargas nuevas."""
+    while True:
+        time.sleep(min(DESCARGAS_PREPARADAS_TTL_SEGUNDOS, 600))
+        try:
+            purgar_descargas_preparadas()
+        except Exception as e:
+            print(f"Error al purgar las descargas preparadas: {e}")
+
+
+threading.Thread(target=_purgar_descargas_periodicamente, name='purga-descargas', daemon=True).start()
+
+
+@server.route('/descargas/<token>')
+def descargar_archivo(token):
+    try:
+        datos = _firmador_descargas.loads(token, max_age=DESCARGA_VIGENCIA_SEGUNDOS)
+        if datos['tipo'] != 'ranking':
+            # Los enlaces a archivos preparados vencen junto con el archivo
+            _firmador_descargas.loads(token, max_age=DESCARGAS_PREPARADAS_TTL_SEGUNDOS)
+    except SignatureExpired:
+        return "El enlace de descarga expiró; vuelve a generarlo desde el dashboard.", 410
+    except BadSignature:
+        abort(404)
+    # El enlace solo sirve a la sesión del navegador para la que se generó
+    if not datos.get('sesion') or datos['sesion'] != session.get('id_sesion'):
+        abort(403)
+    formato = datos.get('formato', 'xlsx')
+    if formato not in FORMATOS_DESCARGA:
+        abort(404)
+    if datos['tipo'] != 'ranking':
+        ruta = os.path.join(DIRECTORIO_DESCARGAS, os.path.basename(datos.get('archivo') or ''))
+        if not datos.get('archivo') or not os.path.isfile(ruta):
+            return "El archivo de descarga ya no está disponible; vuelve a generarlo desde la pestaña Descargar.", 410
+        return send_file(ruta, as_attachment=True, download_name=datos['nombre_archivo'], mimetype=FORMATOS_DESCARGA[formato]['mimetype'])
+
+    # El ranking se arma al pedirlo, pero dentro de un turno para respetar el límite de exportaciones
+    turno = tomar_turno_descarga()
+    if turno is None:
+        return "Hay otras descargas en curso; vuelve a intentarlo en unos segundos.", 503, {'Retry-After': '5'}
+    try:
+        hojas, nombre_archivo = construir_hojas_descarga(datos)
+        ruta = escribir_xlsx_temporal(hojas)
+    finally:
+        turno.close()
+    return enviar_archivo_temporal(ruta, nombre_archivo, FORMATOS_DESCARGA['xlsx']['mimetype'])
 
 
 # --- 6. INICIAR EL SERVIDOR ---
@@ -0,0 +1,82 @@
+"""Lectura rápida de la hoja consolidada de FullStack_Consolidado.xlsx.
+
+Si está instalado python-calamine (pip install python-calamine) se usa ese motor, escrito en
+Rust; si no, se recorre la hoja con openpyxl en modo solo lectura, fila a fila y tomando
+únicamente las columnas pedidas, en lugar del lector completo de pd.read_excel.
+"""
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import python_calamine  # noqa: F401
+    MOTOR_RAPIDO = 'calamine'
+except ImportError:
+    MOTOR_RAPIDO = None
+
+# Textos que pd.read_excel toma como nulos por defecto (na_values); copia de la lista de pandas,
+# que solo está en un módulo privado
+VALORES_NULOS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+
+def leer_hoja_openpyxl(ruta, hoja, columnas=None):
+    """Recorre la hoja en modo solo lectura y arma el DataFrame con las columnas pedidas.
+
+    Cada celda va directo a la lista de su columna, con los nulos ya como NaN; al final
+    cada columna toma su tipo (fechas, números, texto) por separado.
+    """
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        hoja_excel = libro[hoja]
+        filas = hoja_excel.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return pd.DataFrame(columns=columnas)
+        nombres = [str(nombre) if nombre is not None else f"Unnamed: {i}" for i, nombre in enumerate(encabezado)]
+        if columnas is None:
+            columnas = nombres
+        faltantes = [c for c in columnas if c not in nombres]
+        if faltantes:
+            raise ValueError(f"La hoja '{hoja}' no tiene las columnas: {faltantes}")
+
+        posiciones = [nombres.index(c) for c in columnas]
+        valores = [[] for _ in posiciones]
+        filas_con_datos = 0
+        for fila in filas:
+            vacia = True
+            for lista, posicion in zip(valores, posiciones):
+                # Las filas pueden venir más cortas que el encabezado si terminan en celdas vacías
+                valor = fila[posicion] if posicion < len(fila) else None
+                # Igual que pd.read_excel, las celdas vacías y los textos nulos por defecto
+                # (na_values: "NA", "#N/A"...) quedan como NaN
+                if valor is None:
+                    valor = np.nan
+                else:
+                    vacia = False
+                    if isinstance(valor, str) and valor in VALORES_NULOS:
+                        valor = np.nan
+                lista.append(valor)
+            if not vacia:
+                filas_con_datos = len(valores[0])
+    finally:
+        libro.close()
+
+    # Igual que pd.read_excel, se descartan las filas vacías al final de la hoja
+    df = pd.DataFrame({i: pd.Series(lista[:filas_con_datos]) for i, lista in enumerate(valores)})
+    df.columns = columnas
+    return df
+
+
+def leer_hoja(ruta, hoja, columnas=None, motor=None):
+    """Lee la hoja con el motor más rápido disponible ('calamine' u 'openpyxl').
+
+    columnas limita la lectura a esas columnas (por nombre de encabezado); None lee todas.
+    """
+    motor = motor or MOTOR_RAPIDO or 'openpyxl'
+    if motor == 'calamine':
+        df = pd.read_excel(ruta, sheet_name=hoja, usecols=columnas, engine='calamine')
+        return df if columnas is None else df[columnas]
+    return leer_hoja_openpyxl(ruta, hoja, columnas)
@@ -1,6 +1,9 @@
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, types
 import os # Importar os para leer variables de entorno
+import time
+import datetime
+from lector_excel import leer_hoja
 
 # --- CONFIGURACIÓN CON VARIABLES DE ENTORNO ---
 HOST = os.environ.get("HOST")
@@ -8,46 +11,290 @@ USUARIO = os.environ.get("USUARIO")
 CONTRASENA = os.environ.get("CONTRASENA")
 PUERTO = os.environ.get("PUERTO")
 BASE_DE_DATOS = os.environ.get("BASE_DE_DATOS")
+# 'incremental': compara con la tabla por NUMERO_DE_PEDIDO y ROW_HASH y solo aplica los cambios.
+# 'bulk': carga en una tabla sombra con INSERT multi-fila y la intercambia con RENAME TABLE.
+# 'replace': comportamiento anterior con df.to_sql(if_exists='replace').
+MODO_CARGA = os.environ.get("MODO_CARGA", "bulk")
+FILAS_POR_LOTE = int(os.environ.get("FILAS_POR_LOTE", 5000))
 
 # --- CONFIGURACIÓN DEL PROYECTO ---
 RUTA_ARCHIVO = "FullStack_Consolidado.xlsx"
 HOJA_DATOS = "Consolidado FullStack"
 NOMBRE_TABLA = "consolidado_fullstack"
+TABLA_SOMBRA = f"{NOMBRE_TABLA}_nueva"
+TABLA_ANTERIOR = f"{NOMBRE_TABLA}_anterior"
+COLUMNA_CLAVE = "NUMERO_DE_PEDIDO"
+# Hash del contenido de cada fila, para detectar filas modificadas sin comparar columna a columna
+COLUMNA_HASH = "ROW_HASH"
+NULO_HASH = "\\N"
+FORMATO_FECHA_HASH = "%Y-%m-%d %H:%M:%S"
 
 # Validar que todas las variables de entorno se cargaron
 if not all([HOST, USUARIO, CONTRASENA, PUERTO, BASE_DE_DATOS]):
     print("ERROR: Faltan una o más variables de entorno (HOST, USUARIO, CONTRASENA, PUERTO, BASE_DE_DATOS).")
     exit(1)
 
+
+def tipos_columnas(df):
+    """Tipos SQL explícitos por columna, en lugar de los que infiere to_sql.
+
+    El texto libre va siempre como TEXT: si el ancho dependiera de la carga actual, una fila
+    posterior más larga no cabría en la tabla que reutiliza la carga incremental. Solo la clave
+    (que lleva la clave primaria) y el hash quedan como VARCHAR(255).
+    """
+    tipos = {}
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            tipos[columna] = types.DateTime()
+        elif pd.api.types.is_bool_dtype(serie):
+            tipos[columna] = types.Boolean()
+        elif pd.api.types.is_integer_dtype(serie):
+            tipos[columna] = types.BigInteger()
+        elif pd.api.types.is_float_dtype(serie):
+            tipos[columna] = types.Float(precision=53)
+        elif columna in (COLUMNA_CLAVE, COLUMNA_HASH) and serie.dropna().astype(str).str.len().max() <= 255:
+            tipos[columna] = types.String(255)
+        else:
+            tipos[columna] = types.Text()
+    return tipos
+
+
+def tipo_en_mysql(tipo):
+    """(data_type, character_maximum_length) con que information_schema reporta el tipo en MySQL."""
+    if isinstance(tipo, types.Text):
+        return 'text', None
+    if isinstance(tipo, types.String):
+        return 'varchar', tipo.length
+    if isinstance(tipo, types.DateTime):
+        return 'datetime', None
+    if isinstance(tipo, types.Boolean):
+        return 'tinyint', None
+    if isinstance(tipo, types.BigInteger):
+        return 'bigint', None
+    return 'double', None
+
+
+def filas_para_insertar(df):
+    """Tuplas con valores nativos de Python (None para nulos) listas para executemany."""
+    columnas = []
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            # datetime64[us] -> datetime de Python, y NaT -> None
+            columnas.append(serie.to_numpy(dtype='datetime64[us]').tolist())
+        else:
+            columnas.append(serie.astype(object).where(serie.notna(), None).tolist())
+    return list(zip(*columnas))
+
+
+def _valor_para_hash(valor):
+    """Texto de un valor suelto (columnas object) con el mismo formato que texto_para_hash."""
+    if pd.isna(valor):
+        return NULO_HASH
+    if isinstance(valor, (datetime.date, pd.Timestamp)):
+        return valor.strftime(FORMATO_FECHA_HASH)
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def texto_para_hash(serie):
+    """Valores de la columna como texto, sin depender del dtype que infiera pandas.
+
+    Un 5 da '5' tanto en una columna int64 como en una float64 (cuando aparece un vacío) o en
+    una object, y una fecha da el mismo texto como datetime64 o como objeto.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        texto = serie.dt.strftime(FORMATO_FECHA_HASH)
+    elif pd.api.types.is_float_dtype(serie):
+        texto = serie.astype(str)
+        enteros = serie.notna() & (serie % 1 == 0)
+        texto[enteros] = serie[enteros].astype('int64').astype(str)
+    elif pd.api.types.is_numeric_dtype(serie):
+        texto = serie.astype(str)
+    else:
+        return serie.map(_valor_para_hash)
+    return texto.where(serie.notna(), NULO_HASH)
+
+
+def calcular_hash_filas(df):
+    """Hash hexadecimal de 16 caracteres por fila, calculado sobre todas las columnas del Excel.
+
+    Se hashea el texto normalizado de cada valor, así el hash solo cambia si cambian los valores.
+    """
+    normalizado = pd.DataFrame({columna: texto_para_hash(df[columna]) for columna in df.columns})
+    return pd.util.hash_pandas_object(normalizado, index=False).map('{:016x}'.format)
+
+
+def claves_validas(df):
+    return COLUMNA_CLAVE in df.columns and df[COLUMNA_CLAVE].notna().all() and df[COLUMNA_CLAVE].is_unique
+
+
+def insertar_por_lotes(connection, sentencia, filas):
+    """Ejecuta la sentencia con executemany en lotes de FILAS_POR_LOTE sobre una conexión DBAPI."""
+    cursor = connection.cursor()
+    for inicio in range(0, len(filas), FILAS_POR_LOTE):
+        cursor.executemany(sentencia, filas[inicio:inicio + FILAS_POR_LOTE])
+    cursor.close()
+
+
+def cargar_bulk(df, engine):
+    """Carga las filas en una tabla sombra y la intercambia atómicamente con la tabla del dashboard.
+
+    Mientras dura la carga el dashboard sigue leyendo la tabla anterior completa; RENAME TABLE
+    cambia ambas tablas en una sola operación.
+    """
+    columnas = ", ".join(f"`{c}`" for c in df.columns)
+    marcadores = ", ".join(["%s"] * len(df.columns))
+    insert = f"INSERT INTO `{TABLA_SOMBRA}` ({columnas}) VALUES ({marcadores})"
+    filas = filas_para_insertar(df)
+    tipos = tipos_columnas(df)
+
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS `{TABLA_SOMBRA}`"))
+        connection.execute(text(f"DROP TABLE IF EXISTS `{TABLA_ANTERIOR}`"))
+    # Crea la tabla sombra vacía con los tipos explícitos
+    df.head(0).to_sql(name=TABLA_SOMBRA, con=engine, if_exists='fail', index=False, dtype=tipos)
+    if claves_validas(df) and not isinstance(tipos[COLUMNA_CLAVE], types.Text):
+        # La clave primaria permite que las siguientes cargas sean incrementales
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE `{TABLA_SOMBRA}` ADD PRIMARY KEY (`{COLUMNA_CLAVE}`)"))
+
+    # PyMySQL convierte executemany de un INSERT ... VALUES en sentencias multi-fila
+    connection = engine.raw_connection()
+    try:
+        insertar_por_lotes(connection, insert, filas)
+        connection.commit()
+    finally:
+        connection.close()
+
+    with engine.begin() as connection:
+        existe = connection.execute(
+            text("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = :tabla"),
+            {'tabla': NOMBRE_TABLA}
+        ).scalar()
+        if existe:
+            connection.execute(text(f"RENAME TABLE `{NOMBRE_TABLA}` TO `{TABLA_ANTERIOR}`, `{TABLA_SOMBRA}` TO `{NOMBRE_TABLA}`"))
+            connection.execute(text(f"DROP TABLE `{TABLA_ANTERIOR}`"))
+        else:
+            connection.execute(text(f"RENAME TABLE `{TABLA_SOMBRA}` TO `{NOMBRE_TABLA}`"))
+
+
+def tabla_admite_incremental(engine, df):
+    """True si la tabla existe con las mismas columnas y tipos, ROW_HASH y clave primaria en NUMERO_DE_PEDIDO.
+
+    Si algún tipo cambió (por ejemplo, una columna numérica que ahora trae texto) hace falta la
+    carga completa, que vuelve a crear la tabla con tipos_columnas(df).
+    """
+    with engine.connect() as connection:
+        columnas_tabla = {
+            columna: (tipo.lower(), longitud)
+            for columna, tipo, longitud in connection.execute(
+                text("SELECT column_name, data_type, character_maximum_length FROM information_schema.columns "
+                     "WHERE table_schema = DATABASE() AND table_name = :tabla"),
+                {'tabla': NOMBRE_TABLA}
+            ).all()
+        }
+        clave_primaria = connection.execute(
+            text("SELECT column_name FROM information_schema.key_column_usage "
+                 "WHERE table_schema = DATABASE() AND table_name = :tabla AND constraint_name = 'PRIMARY'"),
+            {'tabla': NOMBRE_TABLA}
+        ).scalars().all()
+    if set(columnas_tabla) != set(df.columns) or list(clave_primaria) != [COLUMNA_CLAVE]:
+        return False
+    for columna, tipo in tipos_columnas(df).items():
+        tipo_esperado, longitud_esperada = tipo_en_mysql(tipo)
+        tipo_tabla, longitud_tabla = columnas_tabla[columna]
+        if tipo_tabla != tipo_esperado or (longitud_esperada is not None and longitud_tabla != longitud_esperada):
+            return False
+    return True
+
+
+def cargar_incremental(df, engine):
+    """Aplica solo las altas, modificaciones y bajas respecto a la tabla actual.
+
+    Las filas nuevas o con otro ROW_HASH se escriben con INSERT ... ON DUPLICATE KEY UPDATE y
+    los pedidos que ya no están en el Excel se borran, todo en una sola transacción para que el
+    dashboard nunca vea la tabla a medio actualizar. Devuelve las filas escritas y borradas.
+    """
+    with engine.connect() as connection:
+        existentes = pd.read_sql(text(f"SELECT `{COLUMNA_CLAVE}`, `{COLUMNA_HASH}` FROM `{NOMBRE_TABLA}`"), connection)
+    # Las claves se comparan como texto para no depender del tipo con el que las devuelve MySQL
+    hash_existente = pd.Series(existentes[COLUMNA_HASH].values, index=existentes[COLUMNA_CLAVE].astype(str))
+    claves_nuevas = df[COLUMNA_CLAVE].astype(str)
+    cambiadas = df[claves_nuevas.map(hash_existente).ne(df[COLUMNA_HASH]).values]
+    borradas = existentes.loc[~hash_existente.index.isin(claves_nuevas), COLUMNA_CLAVE].tolist()
+
+    columnas = ", ".join(f"`{c}`" for c in df.columns)
+    marcadores = ", ".join(["%s"] * len(df.columns))
+    actualizaciones = ", ".join(f"`{c}` = VALUES(`{c}`)" for c in df.columns if c != COLUMNA_CLAVE)
+    upsert = f"INSERT INTO `{NOMBRE_TABLA}` ({columnas}) VALUES ({marcadores}) ON DUPLICATE KEY UPDATE {actualizaciones}"
+
+    connection = engine.raw_connection()
+    try:
+        insertar_por_lotes(connection, upsert, filas_para_insertar(cambiadas))
+        cursor = connection.cursor()
+        for inicio in range(0, len(borradas), FILAS_POR_LOTE):
+            lote = borradas[inicio:inicio + FILAS_POR_LOTE]
+            cursor.execute(f"DELETE FROM `{NOMBRE_TABLA}` WHERE `{COLUMNA_CLAVE}` IN ({', '.join(['%s'] * len(lote))})", lote)
+        cursor.close()
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    return len(cambiadas), len(borradas)
+
+
 print("Iniciando migración de datos a Railway...")
 
 try:
     # --- 1. LEER DATOS DEL EXCEL ---
     print(f"Leyendo el archivo Excel: {RUTA_ARCHIVO}")
-    df = pd.read_excel(RUTA_ARCHIVO, sheet_name=HOJA_DATOS)
+    df = leer_hoja(RUTA_ARCHIVO, HOJA_DATOS)
     df.columns = [
         str(col).replace(' ', '_').replace('á', 'a').replace('é', 'e').replace('í', 'i')
            .replace('ó', 'o').replace('ú', 'u').replace('ñ', 'n').upper()
         for col in df.columns
     ]
     print(f"Se han leído {len(df)} filas del Excel.")
+    if MODO_CARGA != 'replace':
+        df[COLUMNA_HASH] = calcular_hash_filas(df)
 
     # --- 2. CONECTARSE A RAILWAY ---
     cadena_conexion = f"mysql+pymysql://{USUARIO}:{CONTRASENA}@{HOST}:{PUERTO}/{BASE_DE_DATOS}"
     engine = create_engine(cadena_conexion)
 
     # --- 3. INSERTAR DATOS ---
-    print(f"Conectando a Railway y cargando datos en la tabla '{NOMBRE_TABLA}'...")
-    df.to_sql(
-        name=NOMBRE_TABLA,
-        con=engine,
-        if_exists='replace',
-        index=False,
-        chunksize=1000
-    )
-    print(f"¡Migración a Railway completada! Se han insertado {len(df)} filas.")
+    print(f"Conectando a Railway y cargando datos en la tabla '{NOMBRE_TABLA}' (modo '{MODO_CARGA}')...")
+    inicio = time.perf_counter()
+    filas_escritas = len(df)
+    if MODO_CARGA == 'incremental' and not claves_validas(df):
+        print(f"AVISO: {COLUMNA_CLAVE} tiene vacíos o duplicados; se hace una carga completa (bulk).")
+        cargar_bulk(df, engine)
+    elif MODO_CARGA == 'incremental' and not tabla_admite_incremental(engine, df):
+        print(f"La tabla no tiene el esquema para carga incremental ({COLUMNA_HASH}, clave primaria y los mismos tipos de columna); se hace una carga completa (bulk).")
+        cargar_bulk(df, engine)
+    elif MODO_CARGA == 'incremental':
+        filas_escritas, filas_borradas = cargar_incremental(df, engine)
+        print(f"Cambios aplicados: {filas_escritas} filas nuevas o modificadas y {filas_borradas} filas eliminadas.")
+    elif MODO_CARGA == 'bulk':
+        cargar_bulk(df, engine)
+    else:
+        df.to_sql(
+            name=NOMBRE_TABLA,
+            con=engine,
+            if_exists='replace',
+            index=False,
+            chunksize=1000
+        )
+    duracion = time.perf_counter() - inicio
+    print(f"¡Migración a Railway completada! Se han escrito {filas_escritas} de {len(df)} filas "
+          f"en {duracion:.1f} s ({filas_escritas / duracion if duracion > 0 else 0:,.0f} filas/s).")
 
 except Exception as e:
     print(f"--- OCURRIÓ UN ERROR DURANTE LA MIGRACIÓN ---")
     print(f"Error: {e}")
-    exit(1)
\ No newline at end of file
+    exit(1)
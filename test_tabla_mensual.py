@@ -0,0 +1,75 @@
+"""Comprueba la tabla mensual Torre/Ejecutivo contra la que daba el bucle anterior.
+
+TABLA_ESPERADA se generó una vez con calcular_tab_mensual tal como estaba antes de armarla con
+groupby (pivot_table y un bucle por torre) sobre las gestiones de GESTIONES.
+
+Uso:
+    python test_tabla_mensual.py
+    python -m pytest test_tabla_mensual.py
+
+Importar dashboard_kpi_DB intenta la carga inicial desde la base de datos; sin las
+variables de entorno solo informa el error y la comprobación sigue con estos datos.
+"""
+import pandas as pd
+
+import dashboard_kpi_DB as dash_db
+from dashboard_kpi_DB import COLUMNA_ANALISTA, COLUMNA_STATUS, COLUMNA_TORRE
+
+# (día, torre, ejecutivo, status, cantidad): meses desordenados, un ejecutivo en dos torres,
+# una torre con un solo ejecutivo y ejecutivos sin gestiones en algunos meses
+GESTIONES = [
+    ('2025-10-03', 'Torre Norte', 'Ximena Ruiz', 'Corregido', 4),
+    ('2025-08-04', 'Torre Norte', 'Ana Perez', 'Corregido', 3),
+    ('2025-08-04', 'Torre Norte', 'Ana Perez', 'Pendiente', 2),
+    ('2025-09-15', 'Torre Norte', 'Bruno Diaz', 'Capacidad', 5),
+    ('2025-10-20', 'Torre Norte', 'Ana Perez', 'Corregido', 1),
+    ('2025-08-11', 'Torre Sur', 'Carla Soto', 'Corregido', 8),
+    ('2025-09-01', 'Torre Sur', 'Carla Soto', 'Escalado', 2),
+    ('2025-10-06', 'Torre Sur', 'Ana Perez', 'Corregido', 6),
+    ('2025-09-22', 'Torre Centro', 'Diego Mora', 'Corregido', 3),
+    ('2025-08-25', 'Torre Oeste', 'Elena Vera', 'Pendiente', 1),
+    ('2025-08-26', 'Torre Oeste', 'Elena Vera', 'Corregido', 1),
+]
+
+# (etiqueta, tipo, agosto, septiembre, octubre, total); los meses van por número porque su
+# nombre depende del locale
+MESES_ESPERADOS = [8, 9, 10]
+TABLA_ESPERADA = [
+    ('Torre Sur', 'Torre', 8, 2, 6, 16),
+    ('     Ana Perez', 'Ejecutivo', 0, 0, 6, 6),
+    ('     Carla Soto', 'Ejecutivo', 8, 2, 0, 10),
+    ('Torre Norte', 'Torre', 5, 5, 5, 15),
+    ('     Ana Perez', 'Ejecutivo', 5, 0, 1, 6),
+    ('     Bruno Diaz', 'Ejecutivo', 0, 5, 0, 5),
+    ('     Ximena Ruiz', 'Ejecutivo', 0, 0, 4, 4),
+    ('Torre Centro', 'Torre', 0, 3, 0, 3),
+    ('     Diego Mora', 'Ejecutivo', 0, 3, 0, 3),
+    ('Torre Oeste', 'Torre', 2, 0, 0, 2),
+    ('     Elena Vera', 'Ejecutivo', 2, 0, 0, 2),
+]
+
+
+def construir_cubo_prueba():
+    """Cubo con las columnas de construir_cubo a partir de GESTIONES."""
+    nombre_mes = {numero: nombre for nombre, numero in dash_db.MESES_POR_NOMBRE.items()}
+    cubo = pd.DataFrame(GESTIONES, columns=['Fecha_Dia', COLUMNA_TORRE, COLUMNA_ANALISTA, COLUMNA_STATUS, 'Cantidad'])
+    cubo['Fecha_Dia'] = pd.to_datetime(cubo['Fecha_Dia'])
+    cubo.insert(1, 'Mes', cubo['Fecha_Dia'].dt.month.map(nombre_mes))
+    cubo.insert(2, 'Semana_Num', cubo['Fecha_Dia'].dt.isocalendar().week.astype(int))
+    return cubo
+
+
+def test_tabla_mensual_igual_a_la_anterior():
+    nombre_mes = {numero: nombre for nombre, numero in dash_db.MESES_POR_NOMBRE.items()}
+    columnas = ['Etiquetas de Fila', 'Tipo'] + [nombre_mes[m] for m in MESES_ESPERADOS] + ['Total General']
+    esperada = [dict(zip(columnas, fila)) for fila in TABLA_ESPERADA]
+
+    data, cols = dash_db.calcular_tab_mensual(None, construir_cubo_prueba(), None, None, None, None, None, 'quincena')
+    assert [c['id'] for c in cols] == [c for c in columnas if c != 'Tipo']
+    assert [list(fila) for fila in data] == [columnas] * len(esperada)
+    assert data == esperada
+
+
+if __name__ == '__main__':
+    test_tabla_mensual_igual_a_la_anterior()
+    print("Tabla mensual: OK")